@@ -6,7 +6,7 @@ if __name__ == '__main__':
     db_manager = DatabaseManager()
     bot = ChessBot(db_manager)
 
-    game_manager = GameManager()
+    game_manager = GameManager(board_type='bitboard')
     game_manager.set_player_types('bot', 'bot')
     game_manager.bot_delay = 0
 
@@ -23,4 +23,6 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         print(f'\nGames played: {games_played}')
         print('Exiting...')
+    finally:
+        game_manager.close()
 
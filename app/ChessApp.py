@@ -87,6 +87,7 @@ class ChessApp(tk.Tk):
     def close(self):
         self.menu_frame.shutdown()
         self.board_canvas.kill_game_thread()
+        self.game_manager.close()
         self.server_manager.close_sockets()
         self.client_manager.close_sockets()
         self.destroy()
@@ -0,0 +1,335 @@
+"""
+NumPy batch engine that holds many positions at once.
+Positions are stored as arrays with one row per position: twelve uint64 piece bitboards (same layout and
+piece order as BitBoard), side to move, castling rights and en passant column. Attack maps, legal moves
+and move application run as vectorized operations over every position, so the interpreter overhead is
+paid once per batch instead of once per game. Moves are packed 16-bit ints, the same encoding as
+Board.generate_legal_moves, so they can be decoded with decode_move or played on a Board.
+
+Requires numpy (pip install numpy).
+"""
+import numpy as np
+
+from components.BitBoard import PIECES, KNIGHT_ATTACKS, KING_ATTACKS
+from components.Board import Board, PROMOTION_CODES, MOVE_PROMOTION, MOVE_EN_PASSANT, MOVE_CASTLING
+
+ZERO, ONE = np.uint64(0), np.uint64(1)
+SQUARE_BITS = np.left_shift(ONE, np.arange(64, dtype=np.uint64))
+KNIGHT_TABLE = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+KING_TABLE = np.array(KING_ATTACKS, dtype=np.uint64)
+
+# masks that drop squares which wrapped around to the other edge after a sideways shift
+_COL_MASKS = {0: np.uint64(0xFFFFFFFFFFFFFFFF),
+              1: np.uint64(0xFEFEFEFEFEFEFEFE), 2: np.uint64(0xFCFCFCFCFCFCFCFC),
+              -1: np.uint64(0x7F7F7F7F7F7F7F7F), -2: np.uint64(0x3F3F3F3F3F3F3F3F)}
+ROW_2 = np.uint64(0xFF << 16)
+ROW_5 = np.uint64(0xFF << 40)
+
+STRAIGHT_STEPS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+DIAGONAL_STEPS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_STEPS = STRAIGHT_STEPS + DIAGONAL_STEPS
+
+# castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+# rights kept when a move starts or ends on a square; moving the king or touching a corner rook clears them
+RIGHTS_KEPT = np.full(64, 15, dtype=np.uint8)
+RIGHTS_KEPT[[60, 63, 56, 4, 7, 0]] = [15 ^ 3, 15 ^ 1, 15 ^ 2, 15 ^ 12, 15 ^ 4, 15 ^ 8]
+
+
+def _shift(bitboards, row_step, col_step):
+    """ Moves every set bit by (row_step, col_step), dropping bits that leave the board """
+    delta = row_step * 8 + col_step
+    if delta > 0:
+        shifted = np.left_shift(bitboards, np.uint64(delta))
+    else:
+        shifted = np.right_shift(bitboards, np.uint64(-delta))
+    return shifted & _COL_MASKS[col_step]
+
+
+def _leaper_attacks(bitboards, steps):
+    attacks = np.zeros_like(bitboards)
+    for row_step, col_step in steps:
+        attacks |= _shift(bitboards, row_step, col_step)
+    return attacks
+
+
+def _slider_attacks(bitboards, occupied, steps):
+    """ Squares attacked along each step direction, up to and including the first occupied square """
+    empty = ~occupied
+    attacks = np.zeros_like(bitboards)
+    for row_step, col_step in steps:
+        ray = bitboards
+        for _ in range(7):
+            ray = _shift(ray, row_step, col_step)
+            attacks |= ray
+            ray = ray & empty
+    return attacks
+
+
+def _pawn_attacks(bitboards, white):
+    """ Squares attacked by pawns of the color given per row by the white bool array """
+    return np.where(white, _leaper_attacks(bitboards, [(-1, -1), (-1, 1)]),
+                    _leaper_attacks(bitboards, [(1, -1), (1, 1)]))
+
+
+def _unpack(bitboards):
+    """ Expands uint64 bitboards into a trailing axis of 64 bools, indexed by square """
+    as_bytes = np.ascontiguousarray(bitboards, dtype='<u8').view(np.uint8)
+    return np.unpackbits(as_bytes.reshape(bitboards.shape + (8,)), axis=-1, bitorder='little').astype(bool)
+
+
+def _attacked(pieces, targets, by_white):
+    """ True for every row where a piece of the by_white color attacks any square in targets """
+    offset = np.where(by_white, 0, 6)[:, None]
+    enemy = np.take_along_axis(pieces, offset + np.arange(6), axis=1)
+    occupied = np.bitwise_or.reduce(pieces, axis=1)
+    hits = _pawn_attacks(targets, ~by_white) & enemy[:, 0]
+    hits |= _leaper_attacks(targets, KNIGHT_STEPS) & enemy[:, 1]
+    hits |= _leaper_attacks(targets, KING_STEPS) & enemy[:, 5]
+    hits |= _slider_attacks(targets, occupied, DIAGONAL_STEPS) & (enemy[:, 2] | enemy[:, 4])
+    hits |= _slider_attacks(targets, occupied, STRAIGHT_STEPS) & (enemy[:, 3] | enemy[:, 4])
+    return hits != 0
+
+
+def _play(pieces, white_to_move, castling, ep_col, moves):
+    """ Returns the state arrays after playing one packed move per row. The inputs are not modified """
+    rows = np.arange(len(moves))
+    moves = moves.astype(np.int64)
+    from_sq, to_sq = moves & 63, moves >> 6 & 63
+    from_bit, to_bit = SQUARE_BITS[from_sq], SQUARE_BITS[to_sq]
+    mover = ((pieces & from_bit[:, None]) != 0).argmax(axis=1)
+    offset = mover - mover % 6
+    is_pawn, is_king = mover % 6 == 0, mover % 6 == 5
+    target_empty = (np.bitwise_or.reduce(pieces, axis=1) & to_bit) == 0
+
+    pieces = pieces & ~to_bit[:, None]
+    pieces[rows, mover] &= ~from_bit
+    promotes = is_pawn & ((to_sq < 8) | (to_sq >= 56))
+    promotion = np.where(moves >> 14 == MOVE_PROMOTION, moves >> 12 & 3, PROMOTION_CODES.index('q'))
+    placed = np.where(promotes, offset + 1 + promotion, mover)
+    pieces[rows, placed] |= to_bit
+
+    en_passant = is_pawn & (from_sq % 8 != to_sq % 8) & target_empty
+    if en_passant.any():
+        captured = SQUARE_BITS[(from_sq[en_passant] & ~7) | (to_sq[en_passant] & 7)]
+        pieces[rows[en_passant], 6 - offset[en_passant]] &= ~captured
+    castles = is_king & (np.abs(to_sq - from_sq) == 2)
+    if castles.any():
+        row_start = from_sq[castles] & ~7
+        kingside = to_sq[castles] > from_sq[castles]
+        rook_move = SQUARE_BITS[row_start + np.where(kingside, 7, 0)] | SQUARE_BITS[row_start + np.where(kingside, 5, 3)]
+        pieces[rows[castles], offset[castles] + 3] ^= rook_move
+
+    castling = castling & RIGHTS_KEPT[from_sq] & RIGHTS_KEPT[to_sq]
+    ep_col = np.where(is_pawn & (np.abs(to_sq - from_sq) == 16), from_sq % 8, -1).astype(np.int8)
+    return pieces, ~white_to_move, castling, ep_col
+
+
+class BatchBoard:
+    """ N chess positions advanced together with vectorized NumPy operations """
+
+    def __init__(self, size=1):
+        start = BatchBoard.from_boards([Board()])
+        self.pieces = np.repeat(start.pieces, size, axis=0)
+        self.white_to_move = np.ones(size, dtype=bool)
+        self.castling = np.full(size, 15, dtype=np.uint8)
+        self.ep_col = np.full(size, -1, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.white_to_move)
+
+    # --- conversion to and from Board ---
+    @classmethod
+    def from_boards(cls, boards):
+        """ Builds a batch from Board or BitBoard instances """
+        batch = cls.__new__(cls)
+        batch.pieces = np.zeros((len(boards), 12), dtype=np.uint64)
+        batch.white_to_move = np.array([board.side_to_move == 'white' for board in boards], dtype=bool)
+        batch.castling = np.zeros(len(boards), dtype=np.uint8)
+        batch.ep_col = np.full(len(boards), -1, dtype=np.int8)
+        for index, board in enumerate(boards):
+            for row in range(8):
+                for col in range(8):
+                    piece = board.get_piece(row, col)
+                    if piece != '':
+                        batch.pieces[index, PIECES.index(piece)] |= SQUARE_BITS[row * 8 + col]
+            white_rights, black_rights = board.get_castling_rights('white'), board.get_castling_rights('black')
+            batch.castling[index] = (('k' in white_rights) * WHITE_KINGSIDE | ('q' in white_rights) * WHITE_QUEENSIDE |
+                                     ('k' in black_rights) * BLACK_KINGSIDE | ('q' in black_rights) * BLACK_QUEENSIDE)
+            if board.double_move_col is not None:
+                batch.ep_col[index] = board.double_move_col
+        return batch
+
+    def to_board(self, index, board_class=Board):
+        """ Returns position index as a new board_class instance """
+        board = board_class()
+        board_array = [[''] * 8 for _ in range(8)]
+        for piece_index, occupied in enumerate(_unpack(self.pieces[index])):
+            for sq in np.flatnonzero(occupied):
+                board_array[sq // 8][sq % 8] = PIECES[piece_index]
+                if PIECES[piece_index] in ('K', 'k'):
+                    board.set_king_loc('white' if piece_index == 5 else 'black', sq // 8, sq % 8)
+        rights = int(self.castling[index])
+        board.white_castling_rights = 'k' * bool(rights & WHITE_KINGSIDE) + 'q' * bool(rights & WHITE_QUEENSIDE)
+        board.black_castling_rights = 'k' * bool(rights & BLACK_KINGSIDE) + 'q' * bool(rights & BLACK_QUEENSIDE)
+        board.double_move_col = None if self.ep_col[index] < 0 else int(self.ep_col[index])
+        board.side_to_move = 'white' if self.white_to_move[index] else 'black'
+        board.set_board_array(board_array)
+        return board
+
+    def to_boards(self, board_class=Board):
+        return [self.to_board(index, board_class) for index in range(len(self))]
+
+    def select(self, indexes):
+        """ Returns a new batch holding only the given positions, e.g. to drop finished games """
+        batch = BatchBoard.__new__(BatchBoard)
+        batch.pieces = self.pieces[indexes]
+        batch.white_to_move = self.white_to_move[indexes]
+        batch.castling = self.castling[indexes]
+        batch.ep_col = self.ep_col[indexes]
+        return batch
+
+    # --- board state ---
+    def planes(self):
+        """ Returns (N, 12, 8, 8) bool piece planes in PIECES order """
+        return _unpack(self.pieces).reshape(len(self), 12, 8, 8)
+
+    def occupancy(self):
+        """ Returns (N, 2) uint64 occupancy of white and black """
+        return np.stack([np.bitwise_or.reduce(self.pieces[:, :6], axis=1),
+                         np.bitwise_or.reduce(self.pieces[:, 6:], axis=1)], axis=1)
+
+    def attack_maps(self):
+        """ Returns (N, 2) uint64 masks of the squares attacked by white and by black """
+        occupied = np.bitwise_or.reduce(self.pieces, axis=1)
+        maps = []
+        for offset, white in ((0, True), (6, False)):
+            pawns, knights, bishops, rooks, queens, kings = self.pieces[:, offset:offset + 6].T
+            attacks = _pawn_attacks(pawns, white)
+            attacks |= _leaper_attacks(knights, KNIGHT_STEPS) | _leaper_attacks(kings, KING_STEPS)
+            attacks |= _slider_attacks(bishops | queens, occupied, DIAGONAL_STEPS)
+            attacks |= _slider_attacks(rooks | queens, occupied, STRAIGHT_STEPS)
+            maps.append(attacks)
+        return np.stack(maps, axis=1)
+
+    def in_check(self):
+        """ True for every position where the side to move is in check """
+        kings = self.pieces[np.arange(len(self)), np.where(self.white_to_move, 5, 11)]
+        return _attacked(self.pieces, kings, ~self.white_to_move)
+
+    # --- move generation ---
+    def _pseudo_moves(self):
+        """ Returns (position index, packed move) for every pseudo-legal move of the side to move.
+            Only castling is checked for attacked squares here """
+        occupancy = self.occupancy()
+        own = np.where(self.white_to_move, occupancy[:, 0], occupancy[:, 1])
+        enemy = np.where(self.white_to_move, occupancy[:, 1], occupancy[:, 0])
+        occupied = own | enemy
+
+        # one entry per piece of the side to move
+        index, piece, sq = np.nonzero(_unpack(self.pieces))
+        mine = (piece < 6) == self.white_to_move[index]
+        index, piece, sq = index[mine], piece[mine] % 6, sq[mine]
+        bits = SQUARE_BITS[sq]
+        white = self.white_to_move[index]
+
+        targets = np.zeros(len(sq), dtype=np.uint64)
+        knights, kings = piece == 1, piece == 5
+        targets[knights] = KNIGHT_TABLE[sq[knights]]
+        targets[kings] = KING_TABLE[sq[kings]]
+        diagonal, straight = (piece == 2) | (piece == 4), (piece == 3) | (piece == 4)
+        targets[diagonal] |= _slider_attacks(bits[diagonal], occupied[index[diagonal]], DIAGONAL_STEPS)
+        targets[straight] |= _slider_attacks(bits[straight], occupied[index[straight]], STRAIGHT_STEPS)
+
+        pawns = piece == 0
+        pawn_index, pawn_white = index[pawns], white[pawns]
+        empty = ~occupied[pawn_index]
+        single = np.where(pawn_white, _shift(bits[pawns], -1, 0), _shift(bits[pawns], 1, 0)) & empty
+        double = np.where(pawn_white, _shift(single & ROW_5, -1, 0), _shift(single & ROW_2, 1, 0)) & empty
+        ep_col = self.ep_col[pawn_index].astype(np.int64)
+        ep_square = np.where(ep_col >= 0, SQUARE_BITS[np.where(pawn_white, 16, 40) + np.maximum(ep_col, 0)], ZERO)
+        captures = _pawn_attacks(bits[pawns], pawn_white) & (enemy[pawn_index] | ep_square)
+        targets[pawns] = single | double | captures
+        targets &= ~own[index]
+
+        # castling: rights held, rook home, squares between them empty, king not passing through an attack
+        king_index = index[kings]
+        rights = self.castling[king_index]
+        attacked = self.attack_maps()[king_index, np.where(white[kings], 1, 0)]
+        rooks = self.pieces[king_index, np.where(white[kings], 3, 9)]
+        king_sq, king_occupied = sq[kings], occupied[king_index]
+        castling_targets = np.zeros(len(king_sq), dtype=np.uint64)
+        for home, side_right, rook, between, passing, destination in (
+                (60, WHITE_KINGSIDE, 63, (61, 62), (60, 61), 62), (60, WHITE_QUEENSIDE, 56, (57, 58, 59), (60, 59), 58),
+                (4, BLACK_KINGSIDE, 7, (5, 6), (4, 5), 6), (4, BLACK_QUEENSIDE, 0, (1, 2, 3), (4, 3), 2)):
+            between_mask = np.bitwise_or.reduce(SQUARE_BITS[list(between)])
+            passing_mask = np.bitwise_or.reduce(SQUARE_BITS[list(passing)])
+            allowed = ((king_sq == home) & (rights & side_right != 0) & (rooks & SQUARE_BITS[rook] != 0) &
+                       (king_occupied & between_mask == 0) & (attacked & passing_mask == 0))
+            castling_targets[allowed] |= SQUARE_BITS[destination]
+        targets[kings] |= castling_targets
+
+        # one entry per (piece, target square)
+        piece_number, to_sq = np.nonzero(_unpack(targets))
+        from_sq = sq[piece_number]
+        index, piece = index[piece_number], piece[piece_number]
+        moves = (from_sq | to_sq << 6).astype(np.int64)
+        promotes = (piece == 0) & ((to_sq < 8) | (to_sq >= 56))
+        flags = np.where((piece == 0) & (from_sq % 8 != to_sq % 8) & ((occupied[index] & SQUARE_BITS[to_sq]) == 0),
+                         MOVE_EN_PASSANT, 0)
+        flags = np.where((piece == 5) & (np.abs(to_sq - from_sq) == 2), MOVE_CASTLING, flags)
+        moves |= flags << 14
+
+        # each promotion becomes four moves, one per PROMOTION_CODES entry
+        repeats = np.where(promotes, 4, 1)
+        index, moves, promotes = np.repeat(index, repeats), np.repeat(moves, repeats), np.repeat(promotes, repeats)
+        codes = np.arange(len(moves)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        moves = np.where(promotes, moves | codes << 12 | MOVE_PROMOTION << 14, moves)
+        return index, moves.astype(np.uint16)
+
+    def legal_moves(self):
+        """ Returns (position index, packed move) arrays holding every legal move of every position,
+            grouped by position. Each candidate is played on a copy and kept if the mover's king is safe """
+        index, moves = self._pseudo_moves()
+        pieces, white_to_move, _, _ = _play(self.pieces[index], self.white_to_move[index],
+                                            self.castling[index], self.ep_col[index], moves)
+        kings = pieces[np.arange(len(index)), np.where(self.white_to_move[index], 5, 11)]
+        legal = ~_attacked(pieces, kings, white_to_move)
+        return index[legal], moves[legal]
+
+    def legal_move_masks(self):
+        """ Returns (N, 64, 64) bool masks where [i, from, to] is set if position i has that legal move """
+        index, moves = self.legal_moves()
+        masks = np.zeros((len(self), 64, 64), dtype=bool)
+        masks[index, moves & 63, moves >> 6 & 63] = True
+        return masks
+
+    def status(self):
+        """ Per position arrays with the keys Board.status returns """
+        index, _ = self.legal_moves()
+        legal_moves = np.bincount(index, minlength=len(self))
+        check = self.in_check()
+        return {'check': check, 'checkmate': check & (legal_moves == 0),
+                'stalemate': ~check & (legal_moves == 0), 'legal_moves': legal_moves}
+
+    def random_moves(self, rng=None):
+        """ Picks one legal move per position uniformly at random. Positions without a move get 0 """
+        rng = np.random.default_rng() if rng is None else rng
+        index, moves = self.legal_moves()
+        counts = np.bincount(index, minlength=len(self))
+        starts = np.cumsum(counts) - counts
+        choice = np.zeros(len(self), dtype=np.uint16)
+        has_move = counts > 0
+        picks = starts[has_move] + (rng.random(has_move.sum()) * counts[has_move]).astype(np.int64)
+        choice[has_move] = moves[picks]
+        return choice
+
+    # --- move application ---
+    def apply_moves(self, moves):
+        """ Plays one packed move per position in place. A move of 0 leaves that position unchanged """
+        moves = np.asarray(moves, dtype=np.uint16)
+        active = moves != 0
+        (self.pieces[active], self.white_to_move[active],
+         self.castling[active], self.ep_col[active]) = _play(self.pieces[active], self.white_to_move[active],
+                                                             self.castling[active], self.ep_col[active], moves[active])
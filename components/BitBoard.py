@@ -0,0 +1,372 @@
+"""
+Bitboard implementation of Board.
+Each of the twelve piece types is stored as a 64-bit int with bit (row * 8 + col) set for every square
+the piece occupies, alongside per-color occupancy. Attacks are looked up in tables built once at import
+so move generation never walks the board square by square.
+"""
+from array import array
+
+from components.Board import Board, ZOBRIST_PIECES, MOVE_PROMOTION, MOVE_EN_PASSANT, MOVE_CASTLING
+from components.Evaluation import WEIGHTS
+
+PIECES = 'PNBRQKpnbrqk'
+PIECE_INDEX = {piece: index for index, piece in enumerate(PIECES)}
+
+
+def _leaper_table(offsets):
+    """ Builds a 64 entry table of attack masks for a piece that jumps by fixed offsets """
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for row_step, col_step in offsets:
+            target_row, target_col = row + row_step, col + col_step
+            if 0 <= target_row <= 7 and 0 <= target_col <= 7:
+                mask |= 1 << (target_row * 8 + target_col)
+        table.append(mask)
+    return table
+
+
+def _ray_table(row_step, col_step):
+    """ Builds a 64 entry table of every square reachable in one direction on an empty board """
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        row, col = row + row_step, col + col_step
+        while 0 <= row <= 7 and 0 <= col <= 7:
+            mask |= 1 << (row * 8 + col)
+            row, col = row + row_step, col + col_step
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _leaper_table([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+# squares attacked by a pawn of the given color standing on a square
+PAWN_ATTACKS = {'white': _leaper_table([(-1, -1), (-1, 1)]),
+                'black': _leaper_table([(1, -1), (1, 1)])}
+
+# (ray table, True if the ray runs towards higher square indexes)
+# the nearest blocker is the lowest set bit on positive rays and the highest set bit on negative rays
+ROOK_RAYS = [(_ray_table(0, 1), True), (_ray_table(1, 0), True),
+             (_ray_table(0, -1), False), (_ray_table(-1, 0), False)]
+BISHOP_RAYS = [(_ray_table(1, 1), True), (_ray_table(1, -1), True),
+               (_ray_table(-1, -1), False), (_ray_table(-1, 1), False)]
+
+PROMOTION_PIECES = ('q', 'r', 'b', 'n')
+FULL = (1 << 64) - 1
+
+
+def slider_attacks(sq, occupied, rays):
+    """ Returns mask of squares attacked from sq along the given rays, stopping at the first blocker """
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def iter_bits(mask):
+    """ Yields the index of every set bit, lowest first """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class BitBoard(Board):
+    """ Drop-in replacement for Board backed by bitboards. Select it wherever a Board is constructed. """
+
+    def __init__(self, reverse=False):
+        self.pieces = [0] * 12
+        self.occupancy = {'white': 0, 'black': 0}
+        self.occupied = 0
+        self.squares = [''] * 64
+        super().__init__(reverse)
+
+    # --- board array compatibility ---
+    # the 8x8 array is rebuilt on request; writes to the returned rows do not affect the board
+    @property
+    def board(self):
+        return [self.squares[row * 8:row * 8 + 8] for row in range(8)]
+
+    @board.setter
+    def board(self, board_array):
+        self.set_board_array(board_array)
+
+    def get_board_array(self):
+        return self.board
+
+    def set_board_array(self, board):
+        self._position_cache = {}
+        self.pieces = [0] * 12
+        self.occupancy = {'white': 0, 'black': 0}
+        self.occupied = 0
+        self.squares = [''] * 64
+        for row in range(8):
+            for col in range(8):
+                if board[row][col] != '':
+                    self._put(row * 8 + col, board[row][col])
+        self.zobrist_key = self.compute_zobrist_key()
+        self.refresh_evaluation()
+
+    def get_piece(self, row, col):
+        return self.squares[row * 8 + col]
+
+    def _put(self, sq, piece):
+        bit = 1 << sq
+        self.pieces[PIECE_INDEX[piece]] |= bit
+        self.occupancy['white' if piece.isupper() else 'black'] |= bit
+        self.occupied |= bit
+        self.squares[sq] = piece
+
+    def _set_square(self, row, col, piece):
+        sq = row * 8 + col
+        old_piece = self._remove(sq)
+        if old_piece != '':
+            self.zobrist_key ^= ZOBRIST_PIECES[old_piece][sq]
+            self.eval_midgame -= WEIGHTS.midgame[old_piece][sq]
+            self.eval_endgame -= WEIGHTS.endgame[old_piece][sq]
+            self.eval_phase -= WEIGHTS.phase[old_piece]
+        if piece != '':
+            self._put(sq, piece)
+            self.zobrist_key ^= ZOBRIST_PIECES[piece][sq]
+            self.eval_midgame += WEIGHTS.midgame[piece][sq]
+            self.eval_endgame += WEIGHTS.endgame[piece][sq]
+            self.eval_phase += WEIGHTS.phase[piece]
+
+    def _remove(self, sq):
+        piece = self.squares[sq]
+        if piece == '':
+            return ''
+        mask = ~(1 << sq)
+        self.pieces[PIECE_INDEX[piece]] &= mask
+        self.occupancy['white' if piece.isupper() else 'black'] &= mask
+        self.occupied &= mask
+        self.squares[sq] = ''
+        return piece
+
+    # --- attacks ---
+    def _attacked(self, sq, attacker_color, occupied, captured=0):
+        """ Returns True if sq is attacked by attacker_color given an occupancy mask.
+            Pieces on the squares in captured are ignored so hypothetical captures can be tested """
+        keep = ~captured
+        if attacker_color == 'white':
+            pawns, knights, bishops, rooks, queens, king = self.pieces[0:6]
+            defender = 'black'
+        else:
+            pawns, knights, bishops, rooks, queens, king = self.pieces[6:12]
+            defender = 'white'
+        if KNIGHT_ATTACKS[sq] & knights & keep:
+            return True
+        if PAWN_ATTACKS[defender][sq] & pawns & keep:
+            return True
+        if KING_ATTACKS[sq] & king:
+            return True
+        diagonal = (bishops | queens) & keep
+        if diagonal and slider_attacks(sq, occupied, BISHOP_RAYS) & diagonal:
+            return True
+        straight = (rooks | queens) & keep
+        if straight and slider_attacks(sq, occupied, ROOK_RAYS) & straight:
+            return True
+        return False
+
+    def is_square_attacked(self, row, col, attacker_color):
+        return self._attacked(row * 8 + col, attacker_color, self.occupied)
+
+    def in_check(self, king_color):
+        if king_color not in ('white', 'black'):
+            return False
+        king_row, king_col = self.king_loc(king_color)
+        return self._attacked(king_row * 8 + king_col, self.opposite_color(king_color), self.occupied)
+
+    def _leaves_king_safe(self, from_sq, to_sq, color, captured_sq):
+        """ Tests a pseudo-legal move without playing it """
+        from_bit = 1 << from_sq
+        captured = 0 if captured_sq is None else 1 << captured_sq
+        occupied = (self.occupied & ~from_bit & ~captured) | (1 << to_sq)
+        if self.squares[from_sq] in ('K', 'k'):
+            king_sq = to_sq
+        else:
+            king_row, king_col = self.king_loc(color)
+            king_sq = king_row * 8 + king_col
+        return not self._attacked(king_sq, self.opposite_color(color), occupied, captured)
+
+    def get_move_masks(self, color):
+        """ Returns (check mask, pins) for a color, computed once per position.
+            check mask holds the squares a non-king move must land on (all squares when not in check,
+            none in double check). pins maps each pinned piece's square to the ray it may still move along """
+        if ('masks', color) in self._position_cache:
+            return self._position_cache['masks', color]
+
+        king_row, king_col = self.king_loc(color)
+        king_sq = king_row * 8 + king_col
+        occupied = self.occupied
+        own = self.occupancy[color]
+        if color == 'white':
+            pawns, knights, bishops, rooks, queens = self.pieces[6:11]
+        else:
+            pawns, knights, bishops, rooks, queens = self.pieces[0:5]
+
+        checkers = (KNIGHT_ATTACKS[king_sq] & knights) | (PAWN_ATTACKS[color][king_sq] & pawns)
+        check_mask = checkers
+        pins = {}
+        for rays, sliders in ((ROOK_RAYS, rooks | queens), (BISHOP_RAYS, bishops | queens)):
+            if not sliders:
+                continue
+            for table, positive in rays:
+                ray = table[king_sq]
+                blockers = ray & occupied
+                if not blockers:
+                    continue
+                first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                first_bit = 1 << first
+                if first_bit & sliders:
+                    checkers |= first_bit
+                    check_mask |= ray ^ table[first]
+                elif first_bit & own:
+                    blockers ^= first_bit
+                    if not blockers:
+                        continue
+                    second = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+                    if (1 << second) & sliders:
+                        pins[first] = ray ^ table[second]
+
+        checker_count = checkers.bit_count()
+        if checker_count == 0:
+            check_mask = FULL
+        elif checker_count > 1:
+            check_mask = 0
+        self._position_cache['masks', color] = (check_mask, pins)
+        return check_mask, pins
+
+    # --- move generation ---
+    def _pseudo_targets(self, sq, piece, color):
+        """ Returns (target mask, en passant target square) for a piece, excluding castling """
+        own = self.occupancy[color]
+        kind = piece.lower()
+        if kind == 'n':
+            return KNIGHT_ATTACKS[sq] & ~own, None
+        if kind == 'b':
+            return slider_attacks(sq, self.occupied, BISHOP_RAYS) & ~own, None
+        if kind == 'r':
+            return slider_attacks(sq, self.occupied, ROOK_RAYS) & ~own, None
+        if kind == 'q':
+            return slider_attacks(sq, self.occupied, BISHOP_RAYS + ROOK_RAYS) & ~own, None
+        if kind == 'k':
+            return KING_ATTACKS[sq] & ~own, None
+
+        # pawns
+        enemy = self.occupancy[self.opposite_color(color)]
+        row = sq >> 3
+        step, start_row, ep_row = (-8, 6, 3) if color == 'white' else (8, 1, 4)
+        targets = PAWN_ATTACKS[color][sq] & enemy
+        ahead = sq + step
+        if 0 <= ahead < 64 and not (self.occupied >> ahead) & 1:
+            targets |= 1 << ahead
+            if row == start_row and not (self.occupied >> (ahead + step)) & 1:
+                targets |= 1 << (ahead + step)
+        ep_sq = None
+        if self.double_move_col is not None and row == ep_row and abs((sq & 7) - self.double_move_col) == 1:
+            ep_sq = ahead - (sq & 7) + self.double_move_col
+            targets |= 1 << ep_sq
+        return targets, ep_sq
+
+    def _castling_targets(self, sq, color):
+        rights = self.get_castling_rights(color)
+        if rights == '':
+            return []
+        enemy_color = self.opposite_color(color)
+        if self._attacked(sq, enemy_color, self.occupied):
+            return []
+        targets = []
+        if 'k' in rights and not self.occupied & (0b11 << (sq + 1)) \
+                and not self._attacked(sq + 1, enemy_color, self.occupied) \
+                and not self._attacked(sq + 2, enemy_color, self.occupied):
+            targets.append(sq + 2)
+        if 'q' in rights and not self.occupied & (0b111 << (sq - 3)) \
+                and not self._attacked(sq - 1, enemy_color, self.occupied) \
+                and not self._attacked(sq - 2, enemy_color, self.occupied):
+            targets.append(sq - 2)
+        return targets
+
+    def _legal_targets(self, sq, piece, color):
+        """ Returns list of legal destination squares for the piece on sq """
+        targets, ep_sq = self._pseudo_targets(sq, piece, color)
+        if piece in ('K', 'k'):
+            # the king is lifted off the board so it can't shield a square from a slider behind it
+            enemy_color = self.opposite_color(color)
+            occupied = self.occupied & ~(1 << sq)
+            legal = [to_sq for to_sq in iter_bits(targets)
+                     if not self._attacked(to_sq, enemy_color, occupied, 1 << to_sq)]
+            legal.extend(self._castling_targets(sq, color))
+            return legal
+
+        check_mask, pins = self.get_move_masks(color)
+        legal = list(iter_bits(targets & check_mask & pins.get(sq, FULL)))
+        # en passant removes two pieces from a rank and can uncover a check, so it is tested on its own
+        if ep_sq is not None:
+            if ep_sq in legal:
+                legal.remove(ep_sq)
+            if self._leaves_king_safe(sq, ep_sq, color, ep_sq + (8 if color == 'white' else -8)):
+                legal.append(ep_sq)
+        return legal
+
+    def _get_valid_moves(self, row, col, add_promotion=False):
+        sq = row * 8 + col
+        piece = self.squares[sq]
+        if piece == '':
+            return []
+        color = 'white' if piece.isupper() else 'black'
+        valid_moves = []
+        promotes = piece in ('P', 'p') and row == (1 if color == 'white' else 6)
+        for to_sq in self._legal_targets(sq, piece, color):
+            if promotes and add_promotion:
+                for promotion_piece in PROMOTION_PIECES:
+                    valid_moves.append((to_sq >> 3, to_sq & 7, promotion_piece))
+            else:
+                valid_moves.append((to_sq >> 3, to_sq & 7))
+        return valid_moves
+
+    def _generate_legal_moves(self, color):
+        moves = array('H')
+        promotion_row = 1 if color == 'white' else 6
+        for sq in iter_bits(self.occupancy[color]):
+            piece = self.squares[sq]
+            targets = self._legal_targets(sq, piece, color)
+            if piece in ('P', 'p'):
+                for to_sq in targets:
+                    move = sq | to_sq << 6
+                    if sq >> 3 == promotion_row:
+                        for code in range(4):
+                            moves.append(move | code << 12 | MOVE_PROMOTION << 14)
+                    elif (to_sq & 7) != (sq & 7) and self.squares[to_sq] == '':
+                        moves.append(move | MOVE_EN_PASSANT << 14)
+                    else:
+                        moves.append(move)
+            elif piece in ('K', 'k'):
+                for to_sq in targets:
+                    if abs(to_sq - sq) == 2:
+                        moves.append(sq | to_sq << 6 | MOVE_CASTLING << 14)
+                    else:
+                        moves.append(sq | to_sq << 6)
+            else:
+                moves.extend([sq | to_sq << 6 for to_sq in targets])
+        return moves
+
+    def get_piece_locations(self, color):
+        return [(sq >> 3, sq & 7) for sq in iter_bits(self.occupancy[color])]
+
+    def count_pieces(self, piece):
+        return self.pieces[PIECE_INDEX[piece]].bit_count()
+
+    def get_num_pieces(self):
+        return self.occupied.bit_count()
@@ -1,18 +1,112 @@
+import random
+from array import array
 from copy import deepcopy
+
+from components.Evaluation import WEIGHTS
+from components.LRUCache import LRUCache
 # from pprint import pprint
 
+# (row step, col step) of every line a rook, bishop or queen can slide along
+STRAIGHT_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+# --- attack tables, built once at import and indexed [row][col] ---
+def _offset_table(offsets):
+    """ Squares reached from each square by a fixed set of jumps """
+    return [[[(row + row_step, col + col_step) for row_step, col_step in offsets
+              if 0 <= row + row_step <= 7 and 0 <= col + col_step <= 7]
+             for col in range(8)] for row in range(8)]
+
+
+def _ray_table(directions):
+    """ Squares along each direction from each square, nearest first. Empty rays are left out """
+    table = [[[] for _ in range(8)] for _ in range(8)]
+    for row in range(8):
+        for col in range(8):
+            for row_step, col_step in directions:
+                ray = []
+                target_row, target_col = row + row_step, col + col_step
+                while 0 <= target_row <= 7 and 0 <= target_col <= 7:
+                    ray.append((target_row, target_col))
+                    target_row, target_col = target_row + row_step, target_col + col_step
+                if ray:
+                    table[row][col].append(ray)
+    return table
+
+
+KNIGHT_SQUARES = _offset_table(KNIGHT_OFFSETS)
+KING_SQUARES = _offset_table(KING_OFFSETS)
+STRAIGHT_RAYS = _ray_table(STRAIGHT_DIRECTIONS)
+DIAGONAL_RAYS = _ray_table(DIAGONAL_DIRECTIONS)
+
+# --- Zobrist keys ---
+# a fixed seed keeps position keys identical across runs and processes
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = {piece: [_zobrist_random.getrandbits(64) for _ in range(64)] for piece in 'PNBRQKpnbrqk'}
+_ZOBRIST_RIGHTS = {(color, side): _zobrist_random.getrandbits(64) for color in ('white', 'black') for side in 'kq'}
+ZOBRIST_CASTLING = {color: {rights: (_ZOBRIST_RIGHTS[color, 'k'] if 'k' in rights else 0)
+                                    ^ (_ZOBRIST_RIGHTS[color, 'q'] if 'q' in rights else 0)
+                            for rights in ('', 'k', 'q', 'kq', 'qk')}
+                    for color in ('white', 'black')}
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+# king_loc is kept apart from the board, so the key covers it too and a stale king location cannot share
+# cached moves with the real position
+ZOBRIST_KING_SQUARES = {color: [_zobrist_random.getrandbits(64) for _ in range(64)] for color in ('white', 'black')}
+
+# centipawn value of each piece, used by static exchange evaluation and the search
+PIECE_VALUES = {'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 0}
+
+# --- packed move encoding ---
+# moves are 16-bit ints: bits 0-5 from square, 6-11 to square (row * 8 + col),
+# 12-13 promotion piece (index into PROMOTION_CODES), 14-15 move flag
+PROMOTION_CODES = 'nbrq'
+MOVE_NORMAL = 0
+MOVE_PROMOTION = 1
+MOVE_EN_PASSANT = 2
+MOVE_CASTLING = 3
+
+
+def encode_move(from_row, from_col, to_row, to_col, promotion_piece=None, flag=MOVE_NORMAL):
+    """ Packs a move into a 16-bit int """
+    move = (from_row * 8 + from_col) | (to_row * 8 + to_col) << 6
+    if promotion_piece is not None:
+        return move | PROMOTION_CODES.index(promotion_piece.lower()) << 12 | MOVE_PROMOTION << 14
+    return move | flag << 14
+
+
+def decode_move(move):
+    """ Unpacks a move into the [from_row, from_col, to_row, to_col(, promotion_piece)] form move_piece takes """
+    from_sq = move & 63
+    to_sq = move >> 6 & 63
+    if move >> 14 == MOVE_PROMOTION:
+        return [from_sq >> 3, from_sq & 7, to_sq >> 3, to_sq & 7, PROMOTION_CODES[move >> 12 & 3]]
+    return [from_sq >> 3, from_sq & 7, to_sq >> 3, to_sq & 7]
+
+
+def move_flag(move):
+    return move >> 14
+
+
+def move_name(move):
+    """ Long algebraic name of a packed move, e.g. e2e4 or a7a8q """
+    from_row, from_col, to_row, to_col, *promotion = decode_move(move)
+    name = f'{chr(ord("a") + from_col)}{8 - from_row}{chr(ord("a") + to_col)}{8 - to_row}'
+    return name + (promotion[0] if promotion else '')
+
+
+# number of legal move lists kept by the cache shared between every board
+MOVE_CACHE_SIZE = 4096
+
+
 class Board:
+    # legal move lists keyed by Zobrist key, shared by all boards (see get_valid_moves, generate_legal_moves)
+    move_cache = LRUCache(MOVE_CACHE_SIZE)
 
     def __init__(self, reverse=False):
-        self.board = [['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r'],
-                      ['p'] * 8,
-                      [''] * 8,
-                      [''] * 8,
-                      [''] * 8,
-                      [''] * 8,
-                      ['P'] * 8,
-                      ['R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R']]
-
         # indicates direction for pawn movement
         self.white_direction = -1
         self.black_direction = 1
@@ -23,6 +117,57 @@ class Board:
 
         # indicates pawn double jump used to determine if en passant is legal
         self.double_move_col = None
+        # color of the player to move, flipped by every move
+        self.side_to_move = 'white'
+
+        self.board = [['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r'],
+                      ['p'] * 8,
+                      [''] * 8,
+                      [''] * 8,
+                      [''] * 8,
+                      [''] * 8,
+                      ['P'] * 8,
+                      ['R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R']]
+
+        # check/pin masks and game status per color, cleared whenever the position changes
+        self._position_cache = {}
+        # 64-bit position key, kept up to date by make_move, unmake_move and the set_ methods
+        self.zobrist_key = self.compute_zobrist_key()
+        # midgame score, endgame score and game phase summed over the pieces, kept up to date by _set_square
+        self.refresh_evaluation()
+
+    # Creates a board set up from a FEN string
+    @classmethod
+    def from_fen(cls, fen):
+        board = cls()
+        board.load_fen(fen)
+        return board
+
+    # Sets up the position described by a FEN string (move counters are ignored)
+    def load_fen(self, fen):
+        fields = fen.split()
+        board = []
+        for fen_row in fields[0].split('/'):
+            row = []
+            for char in fen_row:
+                if char.isdigit():
+                    row.extend([''] * int(char))
+                else:
+                    row.append(char)
+            board.append(row)
+
+        self.side_to_move = 'black' if len(fields) > 1 and fields[1] == 'b' else 'white'
+        rights = fields[2] if len(fields) > 2 else '-'
+        self.white_castling_rights = ''.join(side for side in 'kq' if side.upper() in rights)
+        self.black_castling_rights = ''.join(side for side in 'kq' if side in rights)
+        self.double_move_col = None if len(fields) < 4 or fields[3] == '-' else ord(fields[3][0]) - ord('a')
+        for row in range(8):
+            for col in range(8):
+                if board[row][col] == 'K':
+                    self.set_king_loc('white', row, col)
+                elif board[row][col] == 'k':
+                    self.set_king_loc('black', row, col)
+        self.set_board_array(board)
 
     def __eq__(self, other):
         if self.board == other.board and self.white_castling_rights == other.white_castling_rights and \
@@ -35,6 +180,53 @@ class Board:
 
     def set_board_array(self, board):
         self.board = board
+        self._position_cache = {}
+        self.zobrist_key = self.compute_zobrist_key()
+        self.refresh_evaluation()
+
+    # Builds the Zobrist key of the position from scratch
+    def compute_zobrist_key(self):
+        key = 0
+        for row in range(8):
+            for col in range(8):
+                piece = self.get_piece(row, col)
+                if piece != '':
+                    key ^= ZOBRIST_PIECES[piece][row * 8 + col]
+        return key ^ self._state_key()
+
+    # Recomputes the evaluation sums from scratch, e.g. after the weights are reloaded
+    def refresh_evaluation(self):
+        self.eval_midgame = self.eval_endgame = self.eval_phase = 0
+        for row in range(8):
+            for col in range(8):
+                piece = self.get_piece(row, col)
+                if piece != '':
+                    self.eval_midgame += WEIGHTS.midgame[piece][row * 8 + col]
+                    self.eval_endgame += WEIGHTS.endgame[piece][row * 8 + col]
+                    self.eval_phase += WEIGHTS.phase[piece]
+
+    # Returns the tapered material and piece-square score in centipawns from color's point of view
+    def evaluate(self, color):
+        max_phase = WEIGHTS.max_phase or 1
+        phase = min(self.eval_phase, max_phase)
+        score = (self.eval_midgame * phase + self.eval_endgame * (max_phase - phase)) // max_phase
+        return score if color == 'white' else -score
+
+    # Zobrist contribution of castling rights, king locations, en passant file and side to move
+    def _state_key(self):
+        key = ZOBRIST_CASTLING['white'][self.white_castling_rights] ^ ZOBRIST_CASTLING['black'][self.black_castling_rights]
+        key ^= ZOBRIST_KING_SQUARES['white'][self.white_king_loc[0] * 8 + self.white_king_loc[1]]
+        key ^= ZOBRIST_KING_SQUARES['black'][self.black_king_loc[0] * 8 + self.black_king_loc[1]]
+        return key ^ self._turn_key()
+
+    # Zobrist contribution of en passant file and side to move
+    def _turn_key(self):
+        key = 0
+        if self.double_move_col is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.double_move_col]
+        if self.side_to_move == 'black':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
 
     def get_piece(self, row, col):
         return self.board[row][col]
@@ -43,22 +235,55 @@ class Board:
         return self.white_king_loc if color == 'white' else self.black_king_loc
 
     def set_king_loc(self, color, row, col):
+        self._position_cache = {}
         if color == 'white':
+            old_row, old_col = self.white_king_loc
             self.white_king_loc = (row, col)
         elif color == 'black':
+            old_row, old_col = self.black_king_loc
             self.black_king_loc = (row, col)
+        else:
+            return
+        self.zobrist_key ^= ZOBRIST_KING_SQUARES[color][old_row * 8 + old_col] ^ ZOBRIST_KING_SQUARES[color][row * 8 + col]
 
     def get_castling_rights(self, color):
         return self.white_castling_rights if color == 'white' else self.black_castling_rights
 
     def set_castling_rights(self, color, state):
+        self._position_cache = {}
         if color == 'white':
+            old_state = self.white_castling_rights
             self.white_castling_rights = state
         elif color == 'black':
+            old_state = self.black_castling_rights
             self.black_castling_rights = state
-
-    # Returns list of valid moves for a given piece
+        else:
+            return
+        self.zobrist_key ^= ZOBRIST_CASTLING[color][old_state] ^ ZOBRIST_CASTLING[color][state]
+
+    def set_double_move_col(self, col):
+        self._position_cache = {}
+        self.zobrist_key ^= self._turn_key()
+        self.double_move_col = col
+        self.zobrist_key ^= self._turn_key()
+
+    def set_side_to_move(self, color):
+        self._position_cache = {}
+        self.zobrist_key ^= self._turn_key()
+        self.side_to_move = color
+        self.zobrist_key ^= self._turn_key()
+
+    # Returns list of valid moves for a given piece, served from the shared move cache when possible
     def get_valid_moves(self, row, col, add_promotion=False):
+        key = (self.zobrist_key, row, col, add_promotion)
+        valid_moves = Board.move_cache.get(key)
+        if valid_moves is None:
+            valid_moves = self._get_valid_moves(row, col, add_promotion)
+            Board.move_cache.put(key, valid_moves)
+        return list(valid_moves)
+
+    # Computes the valid moves for a given piece
+    def _get_valid_moves(self, row, col, add_promotion=False):
         piece = self.board[row][col]
         match piece:
             case 'P' | 'p':
@@ -72,22 +297,118 @@ class Board:
             case 'Q' | 'q':
                 pseudo_valid_moves = self.valid_queen_move(piece, row, col)
             case 'K' | 'k':
-                pseudo_valid_moves = self.valid_king_move(piece, row, col)
+                # king targets are already tested against attacks in valid_king_move
+                return self.valid_king_move(piece, row, col)
             case _:
                 return []
 
+        # filter with the check and pin masks instead of playing each move out
+        check_mask, pins = self.get_move_masks(self.get_color(piece))
+        pin_ray = pins.get((row, col))
         valid_moves = []
         for move in pseudo_valid_moves:
-            if not self.move_causes_check(piece, row, col, *move):
+            target = move[:2]
+            if piece in ('P', 'p') and target[1] != col and self.board[target[0]][target[1]] == '':
+                # en passant removes two pieces from a rank and can uncover a check, so it is played out
+                if not self.move_causes_check(piece, row, col, *move):
+                    valid_moves.append(move)
+            elif (check_mask is None or target in check_mask) and (pin_ray is None or target in pin_ray):
                 valid_moves.append(move)
 
         return valid_moves
 
+    # Returns every legal move for a color as packed 16-bit ints (see encode_move)
+    # Cached arrays are shared, so callers must not modify the result. Searches that visit each position
+    # once pass use_cache=False to skip the cache bookkeeping
+    def generate_legal_moves(self, color, use_cache=True):
+        if not use_cache:
+            return self._generate_legal_moves(color)
+        key = (self.zobrist_key, color)
+        moves = Board.move_cache.get(key)
+        if moves is None:
+            moves = self._generate_legal_moves(color)
+            Board.move_cache.put(key, moves)
+        return moves
+
+    # Set the number of move lists the shared cache holds; 0 turns caching off
+    @staticmethod
+    def set_move_cache_size(size):
+        Board.move_cache.set_max_size(size)
+
+    # Generates every legal move for a color without the cache
+    def _generate_legal_moves(self, color):
+        moves = array('H')
+        for row, col in self.get_piece_locations(color):
+            piece = self.board[row][col]
+            for move in self._get_valid_moves(row, col, add_promotion=True):
+                to_row, to_col = move[0], move[1]
+                if len(move) == 3:
+                    moves.append(encode_move(row, col, to_row, to_col, move[2]))
+                elif piece in ('K', 'k') and abs(col - to_col) > 1:
+                    moves.append(encode_move(row, col, to_row, to_col, flag=MOVE_CASTLING))
+                elif piece in ('P', 'p') and col != to_col and self.board[to_row][to_col] == '':
+                    moves.append(encode_move(row, col, to_row, to_col, flag=MOVE_EN_PASSANT))
+                else:
+                    moves.append(encode_move(row, col, to_row, to_col))
+        return moves
+
+    # Returns (check mask, pins) for a color, computed once per position
+    # check mask is None when not in check, otherwise the squares a non-king move must land on to escape
+    # (empty in double check). pins maps each pinned piece's location to the squares it may still move to
+    def get_move_masks(self, color):
+        if ('masks', color) in self._position_cache:
+            return self._position_cache['masks', color]
+
+        king_row, king_col = self.king_loc(color)
+        enemy_color = self.opposite_color(color)
+        checkers = 0
+        check_mask = set()
+        pins = {}
+
+        # sliding checks and pins, looking outward from the king
+        for rays, kind in ((STRAIGHT_RAYS, 'r'), (DIAGONAL_RAYS, 'b')):
+            for ray in rays[king_row][king_col]:
+                own_piece = None
+                for index, (row, col) in enumerate(ray):
+                    piece = self.board[row][col]
+                    if piece != '':
+                        if self.get_color(piece) == color:
+                            if own_piece is not None:
+                                break
+                            own_piece = (row, col)
+                        else:
+                            if piece.lower() in (kind, 'q'):
+                                if own_piece is None:
+                                    checkers += 1
+                                    check_mask.update(ray[:index + 1])
+                                else:
+                                    pins[own_piece] = set(ray[:index + 1])
+                            break
+
+        # knight and pawn checks
+        enemy_knight = 'n' if enemy_color == 'black' else 'N'
+        for row, col in KNIGHT_SQUARES[king_row][king_col]:
+            if self.board[row][col] == enemy_knight:
+                checkers += 1
+                check_mask.add((row, col))
+        enemy_pawn = 'p' if enemy_color == 'black' else 'P'
+        row = king_row - (self.black_direction if enemy_color == 'black' else self.white_direction)
+        for col in (king_col - 1, king_col + 1):
+            if 0 <= row <= 7 and 0 <= col <= 7 and self.board[row][col] == enemy_pawn:
+                checkers += 1
+                check_mask.add((row, col))
+
+        if checkers == 0:
+            check_mask = None
+        elif checkers > 1:
+            check_mask = set()
+        self._position_cache['masks', color] = (check_mask, pins)
+        return check_mask, pins
+
     # Moves a piece from one square to another
     # Checks for validity by default
     def move_piece(self, from_row, from_col, to_row, to_col, promotion_piece=None, force=False):
-        piece = self.board[from_row][from_col]
-        color = self.get_color(piece)
+        piece = self.get_piece(from_row, from_col)
 
         # return False for invalid moves
         if piece == '':
@@ -95,41 +416,99 @@ class Board:
         if not force and (to_row, to_col) not in self.get_valid_moves(from_row, from_col):
             return False
 
+        self.make_move(from_row, from_col, to_row, to_col, promotion_piece)
+        return True
+
+    # Plays a move without checking validity
+    # Returns an undo record that unmake_move uses to restore the board exactly
+    def make_move(self, from_row, from_col, to_row, to_col, promotion_piece=None):
+        self._position_cache = {}
+        piece = self.get_piece(from_row, from_col)
+        target = self.get_piece(to_row, to_col)
+        color = self.get_color(piece)
+        en_passant = piece in ('P', 'p') and from_col != to_col and target == '' and self.double_move_col == to_col
+        undo = (from_row, from_col, to_row, to_col, piece, target, en_passant,
+                self.white_castling_rights, self.black_castling_rights,
+                self.white_king_loc, self.black_king_loc, self.double_move_col,
+                self.side_to_move, self.zobrist_key)
+        # castling rights and king locations update the key through their setters
+        self.zobrist_key ^= self._turn_key()
+
+        # capturing a rook on its home square removes the opponent's castling right on that side
+        if target in ('r', 'R') and to_row == (7 if target == 'R' else 0):
+            target_color = self.get_color(target)
+            rights = self.get_castling_rights(target_color)
+            if to_col == 0:
+                self.set_castling_rights(target_color, rights.replace('q', ''))
+            elif to_col == 7:
+                self.set_castling_rights(target_color, rights.replace('k', ''))
+
+        self.double_move_col = None
         match piece:
             case 'K' | 'k':
                 self.set_king_loc(color, to_row, to_col)
                 self.set_castling_rights(color, '')
                 # castling
                 if abs(from_col - to_col) > 1:
-                    if from_col < to_col:
-                        self.move_piece(from_row, 7, from_row, 5, force=True)
-                    else:
-                        self.move_piece(from_row, 0, from_row, 3, force=True)
-                self.double_move_col = None
+                    rook_from, rook_to = (7, 5) if from_col < to_col else (0, 3)
+                    self._set_square(from_row, rook_to, self.get_piece(from_row, rook_from))
+                    self._set_square(from_row, rook_from, '')
             case 'r' | 'R':
                 rights = self.get_castling_rights(color)
-                if from_col == 0 and 'q' in rights:
+                home_row = 7 if color == 'white' else 0
+                if from_row == home_row and from_col == 0 and 'q' in rights:
                     self.set_castling_rights(color, rights.replace('q', ''))
-                if from_col == 7 and 'k' in rights:
+                if from_row == home_row and from_col == 7 and 'k' in rights:
                     self.set_castling_rights(color, rights.replace('k', ''))
-                self.double_move_col = None
             case 'P' | 'p':
+                if en_passant:
+                    self._set_square(from_row, to_col, '')
                 if abs(from_row - to_row) == 2:
                     self.double_move_col = from_col
-                # if en passant
-                if abs(from_col - to_col) == 1 and abs(from_row - to_row) == 1 and self.double_move_col == to_col:
-                    self.board[from_row][to_col] = ''
-                if abs(from_row - to_row == 1):
-                    self.double_move_col = None
-            case _:
-                self.double_move_col = None
 
         # move piece
-        self.board[to_row][to_col] = piece
-        self.board[from_row][from_col] = ''
+        self._set_square(to_row, to_col, piece)
+        self._set_square(from_row, from_col, '')
         if promotion_piece is not None and (to_row == 0 or to_row == 7):
             self.promote(to_row, to_col, promotion_piece)
-        return True
+
+        self.side_to_move = self.opposite_color(color)
+        self.zobrist_key ^= self._turn_key()
+        return undo
+
+    # Takes back a move using the record returned by make_move
+    def unmake_move(self, undo):
+        self._position_cache = {}
+        (from_row, from_col, to_row, to_col, piece, target, en_passant,
+         self.white_castling_rights, self.black_castling_rights,
+         self.white_king_loc, self.black_king_loc, self.double_move_col,
+         self.side_to_move, zobrist_key) = undo
+
+        self._set_square(from_row, from_col, piece)
+        self._set_square(to_row, to_col, target)
+        if en_passant:
+            self._set_square(from_row, to_col, 'p' if piece == 'P' else 'P')
+        elif piece in ('K', 'k') and abs(from_col - to_col) > 1:
+            rook_from, rook_to = (7, 5) if from_col < to_col else (0, 3)
+            self._set_square(from_row, rook_from, self.get_piece(from_row, rook_to))
+            self._set_square(from_row, rook_to, '')
+        self.zobrist_key = zobrist_key
+
+    # sets the contents of a single square
+    def _set_square(self, row, col, piece):
+        sq = row * 8 + col
+        old_piece = self.board[row][col]
+        if old_piece != '':
+            self.zobrist_key ^= ZOBRIST_PIECES[old_piece][sq]
+            self.eval_midgame -= WEIGHTS.midgame[old_piece][sq]
+            self.eval_endgame -= WEIGHTS.endgame[old_piece][sq]
+            self.eval_phase -= WEIGHTS.phase[old_piece]
+        if piece != '':
+            self.zobrist_key ^= ZOBRIST_PIECES[piece][sq]
+            self.eval_midgame += WEIGHTS.midgame[piece][sq]
+            self.eval_endgame += WEIGHTS.endgame[piece][sq]
+            self.eval_phase += WEIGHTS.phase[piece]
+        self.board[row][col] = piece
 
     # returns the direction for pawns
     def get_direction(self, piece):
@@ -274,6 +653,8 @@ class Board:
         color = self.get_color(piece)
 
         # --- Normal king moves ---
+        # the king is lifted while its targets are tested so it can't shield a square from a slider behind it
+        self._set_square(row, col, '')
         for i in [-1, 0, 1]:
             for j in [-1, 0, 1]:
                 target = (row + i, col + j)
@@ -290,6 +671,7 @@ class Board:
                     continue
                 if target_piece == '' or self.opposing_player(piece, target_piece):
                     valid_moves.append(target)
+        self._set_square(row, col, piece)
 
         # --- castling validation ---
         castling_rights = ''
@@ -310,57 +692,40 @@ class Board:
         return valid_moves
 
     # --- Determine if square is attacked ---
+    # looks outward from the square for each kind of attacker instead of scanning the board for attackers
     def is_square_attacked(self, row, col, attacker_color):
-        for attacker_row in range(8):
-            for attacker_col in range(8):
-                attacker = self.get_piece(attacker_row, attacker_col)
-                if self.get_color(attacker) != attacker_color:
-                    continue
-
-                match attacker:
-                    case '':
-                        continue
-                    case 'k' | 'K':
-                        if abs(row - attacker_row) <= 1 and abs(col - attacker_col) <= 1:
-                            return True
-                    case 'n' | 'N':
-                        row_diff = abs(attacker_row - row)
-                        col_diff = abs(attacker_col - col)
-                        if (row_diff == 1 and col_diff == 2) or (row_diff == 2 and col_diff == 1):
-                            return True
-                    case 'r' | 'R' | 'b' | 'B' | 'q' | 'Q':
-                        # Determine if rook move attacks square
-                        move_sets = {'r': [(0, 1), (0, -1), (1, 0), (-1, 0)],
-                                 'b': [(1, 1), (-1, -1), (-1, 1), (1, -1)]}
-                        move_set = []
-                        if attacker.lower() != 'b':
-                            move_set.extend(move_sets['r'])
-                        if attacker.lower() != 'r':
-                            move_set.extend(move_sets['b'])
-
-                        for move in move_set:
-                            attack_path = (attacker_row, attacker_col)
-                            while True:
-                                attack_path = (attack_path[0] + move[0], attack_path[1] + move[1])
-                                # check if target square has been reached
-                                if attack_path == (row, col):
-                                    return True
-                                # break if out of bounds
-                                if attack_path[0] < 0 or attack_path[0] > 7 or attack_path[1] < 0 or attack_path[1] > 7:
-                                    break
-                                # break if blocked
-                                if self.get_piece(attack_path[0], attack_path[1]) != '':
-                                    break
-
-                    case 'p' | 'P':
-                        # doesn't bother checking for en passant attacks
-                        pawn_direction = self.white_direction if attacker_color == 'white' else self.black_direction
-                        if row == attacker_row + pawn_direction and (col == attacker_col + 1 or col == attacker_col - 1):
+        board = self.board
+        if attacker_color == 'white':
+            pawn, knight, bishop, rook, queen, king = 'P', 'N', 'B', 'R', 'Q', 'K'
+            pawn_row = row - self.white_direction
+        else:
+            pawn, knight, bishop, rook, queen, king = 'p', 'n', 'b', 'r', 'q', 'k'
+            pawn_row = row - self.black_direction
+
+        for attacker_row, attacker_col in KNIGHT_SQUARES[row][col]:
+            if board[attacker_row][attacker_col] == knight:
+                return True
+        for attacker_row, attacker_col in KING_SQUARES[row][col]:
+            if board[attacker_row][attacker_col] == king:
+                return True
+        # doesn't bother checking for en passant attacks
+        if 0 <= pawn_row <= 7:
+            if col > 0 and board[pawn_row][col - 1] == pawn:
+                return True
+            if col < 7 and board[pawn_row][col + 1] == pawn:
+                return True
+
+        for rays, slider in ((STRAIGHT_RAYS, rook), (DIAGONAL_RAYS, bishop)):
+            for ray in rays[row][col]:
+                for attacker_row, attacker_col in ray:
+                    attacker = board[attacker_row][attacker_col]
+                    if attacker != '':
+                        if attacker == slider or attacker == queen:
                             return True
+                        break
 
         return False
 
-
     def in_check(self, king_color):
         #return False
         if king_color == 'white':
@@ -376,42 +741,108 @@ class Board:
 
         return False
 
+    # Returns check, checkmate, stalemate and the number of legal moves for a color from one generation pass
+    # The result is cached until the position changes so every caller in a ply shares it
+    def status(self, color):
+        if ('status', color) not in self._position_cache:
+            legal_moves = len(self.generate_legal_moves(color))
+            check = self.in_check(color)
+            self._position_cache['status', color] = {'check': check,
+                                                     'checkmate': check and legal_moves == 0,
+                                                     'stalemate': not check and legal_moves == 0,
+                                                     'legal_moves': legal_moves}
+        return self._position_cache['status', color]
+
     def in_checkmate(self, king_color):
-        #return False
-        if not self.in_check(king_color):
-            return False
-        if king_color == 'white':
-            king_row, king_col = self.white_king_loc
-        elif king_color == 'black':
-            king_row, king_col = self.black_king_loc
+        return self.status(king_color)['checkmate']
+
+    # Static exchange evaluation: material gained in centipawns by a capture (or a quiet move to a square)
+    # once both sides keep recapturing on the target square with their cheapest piece while it pays to
+    def static_exchange(self, from_row, from_col, to_row, to_col):
+        piece = self.get_piece(from_row, from_col)
+        target = self.get_piece(to_row, to_col)
+        if target == '' and piece in ('P', 'p') and from_col != to_col:
+            target = 'p'
+        gains = [PIECE_VALUES[target.lower()] if target != '' else 0]
+        removed = {(from_row, from_col)}
+        on_square = piece
+        color = self.opposite_color(self.get_color(piece))
+        while True:
+            attacker = self._least_valuable_attacker(to_row, to_col, color, removed)
+            if attacker is None:
+                break
+            attacker_piece, attacker_row, attacker_col = attacker
+            # a king may only recapture when nothing defends the square
+            if attacker_piece in ('K', 'k') and self._least_valuable_attacker(
+                    to_row, to_col, self.opposite_color(color), removed | {(attacker_row, attacker_col)}):
+                break
+            gains.append(PIECE_VALUES[on_square.lower()] - gains[-1])
+            removed.add((attacker_row, attacker_col))
+            on_square = attacker_piece
+            color = self.opposite_color(color)
+        # each side may stop recapturing when continuing would lose material
+        while len(gains) > 1:
+            last = gains.pop()
+            gains[-1] = -max(-gains[-1], last)
+        return gains[0]
+
+    # Static exchange evaluation of a square: material attacker_color wins by starting captures on it (0 if none pay)
+    def square_exchange(self, row, col, attacker_color):
+        attacker = self._least_valuable_attacker(row, col, attacker_color, set())
+        if attacker is None or self.get_piece(row, col) == '':
+            return 0
+        return max(0, self.static_exchange(attacker[1], attacker[2], row, col))
+
+    # Returns (piece, row, col) of the cheapest piece of color attacking a square, treating removed squares as empty
+    def _least_valuable_attacker(self, row, col, color, removed):
+        get_piece = self.get_piece
+        if color == 'white':
+            pawn, knight, bishop, rook, queen, king = 'P', 'N', 'B', 'R', 'Q', 'K'
+            pawn_row = row - self.white_direction
         else:
-            return False
+            pawn, knight, bishop, rook, queen, king = 'p', 'n', 'b', 'r', 'q', 'k'
+            pawn_row = row - self.black_direction
+
+        if 0 <= pawn_row <= 7:
+            for pawn_col in (col - 1, col + 1):
+                if 0 <= pawn_col <= 7 and get_piece(pawn_row, pawn_col) == pawn and (pawn_row, pawn_col) not in removed:
+                    return pawn, pawn_row, pawn_col
+        for attacker_row, attacker_col in KNIGHT_SQUARES[row][col]:
+            if get_piece(attacker_row, attacker_col) == knight and (attacker_row, attacker_col) not in removed:
+                return knight, attacker_row, attacker_col
+
+        sliders = {}
+        for rays, slider in ((DIAGONAL_RAYS, bishop), (STRAIGHT_RAYS, rook)):
+            for ray in rays[row][col]:
+                for attacker_row, attacker_col in ray:
+                    attacker = get_piece(attacker_row, attacker_col)
+                    if attacker != '' and (attacker_row, attacker_col) not in removed:
+                        if attacker == slider or attacker == queen:
+                            sliders.setdefault(attacker, (attacker_row, attacker_col))
+                        break
+        for slider in (bishop, rook, queen):
+            if slider in sliders:
+                return (slider,) + sliders[slider]
 
-        king = self.get_piece(king_row, king_col)
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece != '' and not self.opposing_player(king, piece):
-                    test_board = deepcopy(self)
-                    for (test_row, test_col) in self.get_valid_moves(row, col):
-                        test_board.move_piece(row, col, test_row, test_col)
-                        if not test_board.in_check(king_color):
-
-                            return False
-                        test_board = deepcopy(self)
-        return True
+        for attacker_row, attacker_col in KING_SQUARES[row][col]:
+            if get_piece(attacker_row, attacker_col) == king and (attacker_row, attacker_col) not in removed:
+                return king, attacker_row, attacker_col
+        return None
 
     # checks if a given move cause check on self
     def move_causes_check(self, piece, from_row, from_col, to_row, to_col, promotion_piece=None):
-        test_board = deepcopy(self)
-        test_board.move_piece(from_row, from_col, to_row, to_col, promotion_piece, force=True)
-        return test_board.in_check(self.get_color(piece))
+        undo = self.make_move(from_row, from_col, to_row, to_col, promotion_piece)
+        causes_check = self.in_check(self.get_color(piece))
+        self.unmake_move(undo)
+        return causes_check
 
     # checks if move delivers check to opponent
     def move_delivers_check(self, piece, from_row, from_col, to_row, to_col, promotion_piece=None, mate=False):
-        test_board = deepcopy(self)
-        test_board.move_piece(from_row, from_col, to_row, to_col, promotion_piece, force=True)
-        return test_board.in_check(self.opposite_color(piece)) if not mate else test_board.in_checkmate(self.opposite_color(piece))
+        opponent = self.opposite_color(self.get_color(piece))
+        undo = self.make_move(from_row, from_col, to_row, to_col, promotion_piece)
+        delivers_check = self.in_check(opponent) if not mate else self.in_checkmate(opponent)
+        self.unmake_move(undo)
+        return delivers_check
 
     # checks if pawn is on final row
     def pawn_should_promote(self, row, col):
@@ -428,9 +859,9 @@ class Board:
         piece = self.get_piece(row, col)
         match piece:
             case 'p':
-                self.board[row][col] = promotion_piece.lower()
+                self._set_square(row, col, promotion_piece.lower())
             case 'P':
-                self.board[row][col] = promotion_piece.upper()
+                self._set_square(row, col, promotion_piece.upper())
             case _:
                 return
 
@@ -443,13 +874,11 @@ class Board:
         return locations
 
     def is_stalemate(self, color):
-        if self.in_check(color):
-            return False
-        piece_loc = self.get_piece_locations(color)
-        num_valid_moves = 0
-        for loc in piece_loc:
-            num_valid_moves += len(self.get_valid_moves(*loc))
-        return num_valid_moves == 0
+        return self.status(color)['stalemate']
+
+    # returns how many of a piece (e.g. 'N' or 'p') are on the board
+    def count_pieces(self, piece):
+        return sum(row.count(piece) for row in self.board)
 
     def get_num_pieces(self):
         num_pieces = 0
@@ -1,110 +1,273 @@
+import copy
 import random
-from copy import deepcopy, copy
-from storage.BookMoveManager import BookMoveManager, convert_move
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from components.Board import decode_move, ZOBRIST_BLACK_TO_MOVE
+from components.MateSolver import MateSolver
+from components.MoveOrdering import MoveOrdering
+from components.ParallelSearch import ParallelSearch
+from components.Ponder import Ponderer
+from components.Search import Search
+from components.TranspositionTable import SharedTranspositionTable, TranspositionTable
+from storage.BinaryBook import BinaryBook
+from storage.BookMoveManager import BookMoveManager
 
 class ChessBot:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, search_time=None, search_nodes=None, hash_mb=16, workers=1, shared_hash=False,
+                 ponder=False, mate_depth=3):
+        # the opening book, read into memory once and reloaded when its file changes
         self.book = BookMoveManager()
+        # a compiled book (see storage/BinaryBook.py) is used first when one has been built
+        self.binary_book = BinaryBook.open_if_exists()
         self.db_manager = db_manager
+        # budget for the alpha-beta search; with neither set (the default) the search step is skipped, so the
+        # bot plays from the book, the database and the random steps as it always has
+        self.search_time = search_time
+        self.search_nodes = search_nodes
+        # search results kept between moves, sized in megabytes; in shared memory when other processes search
+        # with it (pickling the table sends only its block name, see SharedTranspositionTable)
+        self.hash_mb = hash_mb
+        self.shared_hash = shared_hash or workers > 1
+        if self.shared_hash:
+            self.transposition_table = SharedTranspositionTable(hash_mb)
+        else:
+            self.transposition_table = TranspositionTable(hash_mb)
+        # forced mates up to mate_depth moves are looked for before the database and the search
+        self.mate_solver = MateSolver(mate_depth)
+        # killer and history tables shared by the move loops and the search
+        self.move_ordering = MoveOrdering()
+        # with more than one worker the search is split across that many processes
+        self.parallel_search = ParallelSearch(workers, transposition_table=self.transposition_table) \
+            if workers > 1 else None
+        # with pondering on, ponder() searches the expected reply in the background on the opponent's time
+        self.ponderer = None
+        self.set_pondering(ponder)
         self.board = None
         self.color = None
-        self.piece_locations = None
-
-    def decide_move(self, board, color):
+        self.legal_moves = None
+        # limits of the current decide_move call: time.time() deadline and a threading.Event
+        self.deadline = None
+        self.cancel_event = None
+        # one thread runs the database steps (see run_bounded), started on first use
+        self._db_executor = None
+        self._db_future = None
+
+    def close(self):
+        """ Stops the search workers, frees a shared transposition table and closes the compiled book """
+        if self.ponderer is not None:
+            self.ponderer.close()
+        if self.parallel_search is not None:
+            self.parallel_search.close()
+        if isinstance(self.transposition_table, SharedTranspositionTable):
+            self.transposition_table.unlink()
+        if self.binary_book is not None:
+            self.binary_book.close()
+        if self._db_executor is not None:
+            # a call blocked on the database is left to time out on its own
+            self._db_executor.shutdown(wait=False, cancel_futures=True)
+            self._db_executor = None
+
+    def decide_move(self, board, color, deadline=None, cancel_event=None):
+        """ Trial moves are played and taken back on board, so pass a copy of a board other threads read.
+            deadline is a time.time() value and cancel_event a threading.Event; when either fires the best
+            legal move found so far is returned within a few milliseconds. A legal move is always returned
+            while color has one """
         self.board = board
         self.color = color
-        self.piece_locations = self.board.get_piece_locations(self.color)
-
-        move_method = 'book'
-        move = self.get_book_move()
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        # every legal move for the position, packed as 16-bit ints (see Board.encode_move)
+        self.legal_moves = self.board.generate_legal_moves(self.color)
+        self.move_ordering.decay()
+        pondered = self.ponderer.finish(board) if self.ponderer is not None else None
+
+        steps = (('book', self.get_book_move),
+                 ('checkmate', self.search_for_checkmate),
+                 ('db move', lambda: self.run_bounded(ChessBot.pick_best_db_move)),
+                 ('search', lambda: self.search_move(pondered)),
+                 ('weighted random', self.pick_weighted_random_move),
+                 ('random', self.pick_random_move))
+        move_method, move = 'fallback', None
+        for method, step in steps:
+            if self.is_stopped():
+                break
+            move = step()
+            if move is not None and self.is_legal(move):
+                move_method = method
+                break
+            move = None
         if move is None:
-            move_method = 'checkmate'
-            move = self.search_for_checkmate()
-            if move is None:
-                move_method = 'db move'
-                move = self.pick_best_db_move()
-                if move is None:
-                    move_method = 'weighted random'
-                    move = self.pick_weighted_random_move()
-                    if move is None:
-                        move_method = 'random'
-                        move = self.pick_random_move()
+            move = self.fallback_move()
         print(f'Bot move method: {move_method}')
 
         return move
 
+    def is_stopped(self):
+        """ True once the current decision is cancelled or out of time """
+        return ((self.cancel_event is not None and self.cancel_event.is_set()) or
+                (self.deadline is not None and time.time() >= self.deadline))
+
+    def time_left(self):
+        return None if self.deadline is None else max(self.deadline - time.time(), 0.001)
+
+    def is_legal(self, move):
+        # database moves are denormalized guesses, so every step's move is checked before it is played
+        return any(decode_move(legal_move)[:4] == list(move[:4]) for legal_move in self.legal_moves)
+
+    def fallback_move(self):
+        """ The most promising legal move by move ordering (hash move first), or None without legal moves """
+        if len(self.legal_moves) == 0:
+            return None
+        key = self.board.zobrist_key
+        if self.board.side_to_move != self.color:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        entry = self.transposition_table.probe(key)
+        hash_move = entry[0] if entry is not None else 0
+        return decode_move(self.move_ordering.order(self.board, self.legal_moves, hash_move=hash_move)[0])
+
+    def run_bounded(self, method):
+        """ Calls method(bot) on the database thread with a copy of the bot, waiting only until the decision
+            is cancelled or out of time; a call still blocked on the database finishes unseen. While one is
+            still running, later calls return None at once rather than queueing behind it """
+        if self._db_future is not None and not self._db_future.done():
+            return None
+        # the copy gets its own board, legal moves and move ordering, and none of the search state
+        bot = copy.copy(self)
+        bot.board = copy.deepcopy(self.board)
+        bot.legal_moves = copy.copy(self.legal_moves)
+        bot.move_ordering = self.move_ordering.copy()
+        bot.transposition_table = bot.parallel_search = bot.ponderer = bot.mate_solver = None
+        bot._db_executor = bot._db_future = None
+        if self._db_executor is None:
+            self._db_executor = ThreadPoolExecutor(1, thread_name_prefix='bot-db')
+        self._db_future = future = self._db_executor.submit(method, bot)
+        while True:
+            try:
+                return future.result(timeout=0.005)
+            except TimeoutError:
+                if self.is_stopped():
+                    return None
+            except Exception as e:
+                print(f'Bot database step failed: {e}')
+                return None
+
     def get_book_move(self):
         """ Selects and returns a book move """
-        self.book.connect()
-        moves = self.book.get_moves(self.board.create_board_str())
-        self.book.close()
+        if self.binary_book is not None:
+            entries = self.binary_book.get_entries(self.board, self.color)
+            if entries:
+                entry = random.choices(entries, weights=[entry['weight'] for entry in entries])[0]
+                return decode_move(entry['move'])
+        moves = self.book.get_moves(self.board, self.color)
         if moves is None:
             return None
-        chosen_move = random.choice(moves)
-        return convert_move(self.board, chosen_move, self.color)
+        return random.choice(moves)
+
+    def ponder(self, board, color):
+        """ Starts searching, on the opponent's time, the position after the reply the last search expects.
+            board is the position after color's move. Does nothing without ponder or an expected reply """
+        if self.ponderer is None:
+            return
+        # the reply is the best move stored for the position (the opponent is to move in it)
+        entry = self.transposition_table.probe(board.zobrist_key)
+        if entry is None or entry[0] not in board.generate_legal_moves(board.opposite_color(color)):
+            self.ponderer.stop()
+            return
+        self.ponderer.start(board, color, entry[0])
+
+    def set_pondering(self, enabled):
+        """ Starts or ends pondering. The ponder worker searches into the bot's table, so the table moves to
+            shared memory while pondering is on and back to a local one after, unless shared_hash was set """
+        if enabled and self.ponderer is None:
+            if not isinstance(self.transposition_table, SharedTranspositionTable):
+                self.transposition_table = SharedTranspositionTable(self.hash_mb)
+            self.ponderer = Ponderer(self.transposition_table)
+        elif not enabled and self.ponderer is not None:
+            self.ponderer.close()
+            self.ponderer = None
+            if not self.shared_hash:
+                self.transposition_table.unlink()
+                self.transposition_table = TranspositionTable(self.hash_mb)
+
+    def stop_pondering(self):
+        if self.ponderer is not None:
+            self.ponderer.stop()
+
+    def search_move(self, pondered=None):
+        """ Returns the best move found by alpha-beta search within the time/node budget.
+            pondered is the result of a ponder hit: its time and nodes count against the budget """
+        if self.search_time is None and self.search_nodes is None:
+            return None
+        time_limit, node_limit = self.search_time, self.search_nodes
+        if pondered is not None:
+            print(f'Bot ponder hit: depth {pondered["depth"]} in {pondered["time"]:.2f}s')
+            if time_limit is not None:
+                time_limit -= pondered['time']
+            if node_limit is not None:
+                node_limit -= pondered['nodes']
+        if pondered is not None and ((time_limit is not None and time_limit <= 0) or
+                                     (node_limit is not None and node_limit <= 0)):
+            # the ponder search already had the whole budget
+            result = pondered
+        else:
+            # the search never runs past the decision's deadline and stops with it when cancelled
+            if self.deadline is not None:
+                time_limit = self.time_left() if time_limit is None else min(time_limit, self.time_left())
+            if self.parallel_search is not None:
+                result = self.parallel_search.search(self.board, self.color, node_limit=node_limit,
+                                                     time_limit=time_limit, stop_event=self.cancel_event)
+            else:
+                search = Search(self.board, node_limit=node_limit, time_limit=time_limit,
+                                transposition_table=self.transposition_table, move_ordering=self.move_ordering,
+                                stop_event=self.cancel_event)
+                result = search.search(self.color)
+        if result is None:
+            return None
+        print(f'Bot search: depth {result["depth"]}, score {result["score"]}, nodes {result["nodes"]}, '
+              f'{result["nps"]:.0f} nodes/s, pv {" ".join(result["pv"])}')
+        if 'workers' in result:
+            speedup = '' if result['speedup'] is None else f', {result["speedup"]:.1f}x nodes/s of one worker'
+            print(f'Bot search: {result["workers"]} workers, {result["cpu_utilisation"]:.1f} CPUs busy{speedup}')
+        return result['move']
 
     def pick_random_move(self):
-        random.shuffle(self.piece_locations)
-        move = None
-        valid_moves = []
-        for loc in self.piece_locations:
-            piece_valid_moves = self.board.get_valid_moves(loc[0], loc[1], add_promotion=True)
-            if len(piece_valid_moves) > 0:
-                for move in piece_valid_moves:
-                    if move not in valid_moves:
-                        valid_moves.append([*loc, *move])
-
-        if len(valid_moves) > 0:
-            move = random.choice(valid_moves)
-
-        if move is None:
+        if len(self.legal_moves) == 0:
             return None
-        else:
-            return move
+        return decode_move(random.choice(self.legal_moves))
 
     def pick_weighted_random_move(self):
-        random.shuffle(self.piece_locations)
+        moves = list(self.legal_moves)
+        random.shuffle(moves)
         potential_moves = []
-        test_board = deepcopy(self.board)
-        for loc in self.piece_locations:
-            valid_moves = self.board.get_valid_moves(loc[0], loc[1], add_promotion=True)
-            for to_loc in valid_moves:
-                attacker_piece = self.board.get_piece(loc[0], loc[1])
-                target_piece = self.board.get_piece(to_loc[0], to_loc[1])
-
-                # --- premove checks ---
-                is_pawn = attacker_piece.lower() == 'p'
-                under_attack = self.board.is_square_attacked(*loc, self.board.opposite_color(self.color))
-                promotes_pawn = attacker_piece.lower() == 'p' and (to_loc[0] == 0 or to_loc[0] == 7)
-
-                test_board.move_piece(*loc, *to_loc, force=True)
-
-                # --- postmove checks ---
-                delivers_check = test_board.in_check(self.board.opposite_color(self.color))
-                if test_board.is_square_attacked(to_loc[0], to_loc[1], test_board.opposite_color(self.color)):
-                    risk_value = 0.3 if attacker_piece.lower() == 'q' else (0.2 if attacker_piece.lower() == 'r' else
-                                 0.15 if attacker_piece.lower() in ['b', 'n'] else 0.1 if attacker_piece.lower() == 'p' else 0)
-                else:
-                    risk_value = 0
-                capture_value = 0.3 if target_piece.lower() == 'q' else (0.2 if target_piece.lower() == 'r' else
-                                0.15 if target_piece.lower() in ['b', 'n'] else 0.1 if target_piece.lower() == 'p' else 0)
-
-                move_rating = 0.4
-                if is_pawn: move_rating += 0.05
-                if under_attack: move_rating += 0.05
-                if promotes_pawn: move_rating += 0.1
-                if delivers_check: move_rating += 0.2
-                move_rating += capture_value
-                move_rating -= risk_value
-
-                potential_moves.append([*loc, *to_loc, move_rating])
-
-                # --- undo move on test_board ---
-                test_board.board[loc[0]] = copy(self.board.board[loc[0]])
-                test_board.board[to_loc[0]] = copy(self.board.board[to_loc[0]])
-                test_board.white_castling_rights, test_board.black_castling_rights = self.board.white_castling_rights, self.board.black_castling_rights
-                test_board.white_king_loc, test_board.black_king_loc = self.board.white_king_loc, self.board.black_king_loc
-                test_board.double_move_col = self.board.double_move_col
+        for packed_move in moves:
+            move = decode_move(packed_move)
+            from_row, from_col, to_row, to_col = move[:4]
+            attacker_piece = self.board.get_piece(from_row, from_col)
+
+            # --- premove checks ---
+            is_pawn = attacker_piece.lower() == 'p'
+            under_attack = self.board.square_exchange(from_row, from_col, self.board.opposite_color(self.color)) > 0
+            promotes_pawn = attacker_piece.lower() == 'p' and (to_row == 0 or to_row == 7)
+            # material won or lost once the exchange on the target square plays out (pieces left hanging count)
+            exchange_value = self.board.static_exchange(from_row, from_col, to_row, to_col) / 3000
+
+            undo = self.board.make_move(*move)
+
+            # --- postmove checks ---
+            delivers_check = self.board.in_check(self.board.opposite_color(self.color))
+
+            move_rating = 0.4
+            if is_pawn: move_rating += 0.05
+            if under_attack: move_rating += 0.05
+            if promotes_pawn: move_rating += 0.1
+            if delivers_check: move_rating += 0.2
+            move_rating += exchange_value
+
+            potential_moves.append([*move, move_rating])
+
+            # --- undo move ---
+            self.board.unmake_move(undo)
 
         potential_moves = sorted(potential_moves, key=lambda x: x[-1], reverse=True)
         for i, move in enumerate(potential_moves):
@@ -114,13 +277,12 @@ class ChessBot:
 
 
     def search_for_checkmate(self):
-        for loc in self.piece_locations:
-            valid_moves = self.board.get_valid_moves(loc[0], loc[1], add_promotion=True)
-            for to_loc in valid_moves:
-                attacker_piece = self.board.get_piece(loc[0], loc[1])
-                if self.board.move_delivers_check(attacker_piece, loc[0], loc[1], *to_loc, mate=True):
-                    return loc + to_loc
-        return None
+        """ Returns the first move of the shortest forced mate within mate_depth moves, if there is one """
+        result = self.mate_solver.solve(self.board, self.color, self.deadline, self.cancel_event)
+        if result is None:
+            return None
+        print(f'Bot mate in {result["mate_in"]}: {result["nodes"]} nodes')
+        return result['move']
 
     def pick_best_db_move(self):
         if not self.db_manager.ping():
@@ -168,17 +330,20 @@ class ChessBot:
         for char in move_to_play_str:
             move_to_play.append(int(char)) if char.isdigit() else move_to_play.append(char)
 
-        # --- translate normalized more to actual move ---
+        return self.denormalize_move(move_to_play)
+
+    def denormalize_move(self, move):
+        """ Translates a normalized (database) move to the actual move on the board """
+        move = list(move)
         # --- if opposing king is above player king, vertically flip move
         if self.board.king_loc(self.color)[0] < self.board.king_loc(self.board.opposite_color(self.color))[0]:
-            move_to_play[0] = 7 - move_to_play[0]
-            move_to_play[2] = 7 - move_to_play[2]
+            move[0] = 7 - move[0]
+            move[2] = 7 - move[2]
         # --- if opposing king is to the right of player king, horizontally flip move
         if self.board.king_loc(self.color)[1] > self.board.king_loc(self.board.opposite_color(self.color))[1]:
-            move_to_play[1] = 7 - move_to_play[1]
-            move_to_play[3] = 7 - move_to_play[3]
-
-        return move_to_play
+            move[1] = 7 - move[1]
+            move[3] = 7 - move[3]
+        return move
 
     # instead of looking for a move that results in a good chance of winning, look for a move that puts opponent
     # in the position with the worst chance of success
@@ -186,49 +351,47 @@ class ChessBot:
         if not self.db_manager.ping():
             return None
 
-        test_board = deepcopy(self.board)
-        # --- for each of player's pieces ---
-        for loc in self.piece_locations:
-            valid_moves = self.board.get_valid_moves(*loc, add_promotion=True)
-            # --- for each of the piece's valid moves ---
-            for to_loc in valid_moves:
-                # --- sim move and get board query ---
-                test_board.move_piece(*loc, *to_loc)
-                test_board_str = test_board.normalized_board_str(self.board.opposite_color(self.color))
-                opp_board = self.db_manager.read({'board':test_board_str})
-
-                # --- reset the board for next move ---
-                # whole affected rows are reset - this mostly prevents ghosting pawns in case of an en passant
-                test_board.board[loc[0]] = copy(self.board.board[loc[0]])
-                test_board.board[to_loc[0]] = copy(self.board.board[to_loc[0]])
-                test_board.white_castling_rights, test_board.black_castling_rights = self.board.white_castling_rights, self.board.black_castling_rights
-                test_board.white_king_loc, test_board.black_king_loc = self.board.white_king_loc, self.board.black_king_loc
-                test_board.double_move_col = self.board.double_move_col
-
-                # --- if the board wasn't in the db, consider it 50-50 ---
-                if opp_board is None:
-                    continue
-                else:
-                    # --- Find opponent's lowest odd of losing from the resulting position ---
-                    opp_best_odds = 1
-                    for opp_move in opp_board['moves']:
-                        times_played = opp_move['win'] + opp_move['draw'] + opp_move['loss']
-                        opp_loss_odds = opp_move['loss'] / times_played
-                        if opp_loss_odds < opp_best_odds:
-                            opp_best_odds = opp_loss_odds
-                    if random.random() < opp_best_odds:
-                        move_to_play = list(loc + to_loc)
-                        return move_to_play
+        # --- for each of player's valid moves, most promising first, sim move and get board query ---
+        moves = []
+        test_board_strs = []
+        for packed_move in self.move_ordering.order(self.board, self.legal_moves):
+            move = decode_move(packed_move)
+            undo = self.board.make_move(*move)
+            test_board_strs.append(self.board.normalized_board_str(self.board.opposite_color(self.color)))
+            # --- reset the board for next move ---
+            self.board.unmake_move(undo)
+            moves.append(move)
+
+        # --- one query for every resulting board ---
+        opp_boards = self.db_manager.read_many(test_board_strs)
+        if opp_boards is None:
+            return None
+
+        for move, test_board_str in zip(moves, test_board_strs):
+            opp_board = opp_boards.get(test_board_str)
+            # --- if the board wasn't in the db, consider it 50-50 ---
+            if opp_board is None:
+                continue
+            else:
+                # --- Find opponent's lowest odd of losing from the resulting position ---
+                opp_best_odds = 1
+                for opp_move in opp_board['moves']:
+                    times_played = opp_move['win'] + opp_move['draw'] + opp_move['loss']
+                    opp_loss_odds = opp_move['loss'] / times_played
+                    if opp_loss_odds < opp_best_odds:
+                        opp_best_odds = opp_loss_odds
+                if random.random() < opp_best_odds:
+                    return move
 
         return None
 
     def try_new_move(self, prev_moves):
-        valid_moves = []
-        for loc in self.piece_locations:
-            loc_moves = self.board.get_valid_moves(*loc, add_promotion=True)
-            for move in loc_moves:
-                if move not in prev_moves:
-                    valid_moves.append(loc + move)
+        """ Picks a random move that is not among the normalized moves already seen in the database """
+        seen_moves = set()
+        for prev_move in prev_moves:
+            move = self.denormalize_move(prev_move)
+            seen_moves.add(tuple(move[:4]) + tuple(str(piece).lower() for piece in move[4:]))
+        valid_moves = [move for move in map(decode_move, self.legal_moves) if tuple(move) not in seen_moves]
         if len(valid_moves) == 0:
             return None
         move = random.choice(valid_moves)
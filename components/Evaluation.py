@@ -0,0 +1,42 @@
+"""
+Material and piece-square evaluation, tapered between the midgame and the endgame.
+Weights are read from res/eval_weights.json so they can be tuned without touching code. Every piece
+on a square contributes a midgame score, an endgame score and a phase weight; Board keeps the three sums
+up to date in _set_square, so scoring a position is O(1) (see Board.evaluate).
+"""
+import json
+from pathlib import Path
+
+WEIGHTS_PATH = Path(__file__).resolve().parent.parent / 'res' / 'eval_weights.json'
+
+
+class EvaluationWeights:
+    """ Per piece tables of 64 scores, material included, indexed [piece][row * 8 + col].
+        White pieces score positive and black pieces negative """
+
+    def __init__(self, path=WEIGHTS_PATH):
+        self.midgame = {}
+        self.endgame = {}
+        self.phase = {}
+        self.max_phase = 0
+        self.load(path)
+
+    def load(self, path=WEIGHTS_PATH):
+        """ Reads the weights file. Boards created before a reload need refresh_evaluation() """
+        with open(path) as weights_file:
+            weights = json.load(weights_file)
+        for stage, table in (('midgame', self.midgame), ('endgame', self.endgame)):
+            for piece, rows in weights['tables'][stage].items():
+                material = weights['material'][stage][piece]
+                scores = [material + score for row in rows for score in row]
+                table[piece.upper()] = scores
+                # black uses the square mirrored top to bottom
+                table[piece] = [-scores[(7 - sq // 8) * 8 + sq % 8] for sq in range(64)]
+        for piece, weight in weights['phase'].items():
+            self.phase[piece.upper()] = self.phase[piece] = weight
+        # phase of the starting position: a full midgame
+        self.max_phase = sum(self.phase[piece] * count for piece, count in
+                             (('p', 16), ('n', 4), ('b', 4), ('r', 4), ('q', 2)))
+
+
+WEIGHTS = EvaluationWeights()
@@ -3,17 +3,26 @@ import queue
 import threading
 from _queue import Empty
 from copy import deepcopy
-from time import sleep
+from time import time
 
+from components.BitBoard import BitBoard
 from components.Board import Board
 from components.ChessBot import ChessBot
 from storage.BoardLog import BoardLog
 from storage.DatabaseManager import DatabaseManager
 
 
+# board engines selectable when constructing a GameManager
+BOARD_TYPES = {'array': Board, 'bitboard': BitBoard}
+# seconds the bot searches per move against a player or LAN opponent; bot-vs-bot games do not search
+BOT_SEARCH_TIME = 1.0
+
+
 class GameManager:
-    def __init__(self):
-        self.board = Board()
+    def __init__(self, board_type='array'):
+        """ board_type should be array or bitboard """
+        self.board_class = BOARD_TYPES[board_type]
+        self.board = self.board_class()
         self.turn = 'white'
         self.winner = None
         self.white_player_type = None
@@ -31,13 +40,19 @@ class GameManager:
 
         self.game_loop_interrupt = False
         self.waiting_on_move = False
+        # legality checks play and take back moves on the board, so the GUI and game threads take turns with it
+        self.board_lock = threading.RLock()
 
         # Attempt to connect to database
         self.db_manager = DatabaseManager()
         self.commit_thread = None
 
+        # search and pondering are turned on by set_player_types when the bot plays a player or LAN opponent
         self.bot = ChessBot(self.db_manager)
         self.bot_delay = 1
+        # hard limit in seconds on one bot decision; bot_cancel ends a decision early
+        self.bot_move_time = 3.0
+        self.bot_cancel = threading.Event()
 
     def set_player_types(self, white_type = 'player', black_type = 'bot'):
         """ Type should be player, bot, or lan_opp (LAN opponent) """
@@ -47,6 +62,12 @@ class GameManager:
             self.lan_match = True
         else:
             self.lan_match = False
+        # the bot only searches, and ponders on the opponent's time (see bot_move), against an opponent that
+        # is not a bot; self-play keeps feeding the database from the book, database and random steps
+        player_types = (white_type, black_type)
+        human_opponent = 'bot' in player_types and ('player' in player_types or 'lan_opp' in player_types)
+        self.bot.search_time = BOT_SEARCH_TIME if human_opponent else None
+        self.bot.set_pondering(human_opponent)
 
     def set_network_manager(self, manager):
         # manager can be a GameHoster or GameClient
@@ -87,18 +108,21 @@ class GameManager:
 
     def valid_squares(self, row, col):
         """ Returns list of valid squares for a given piece """
-        return self.board.get_valid_moves(row, col)
+        with self.board_lock:
+            return self.board.get_valid_moves(row, col)
 
     def get_piece(self, row, col):
         return self.board.get_piece(row, col)
 
     def get_checked_king_loc(self):
         """ Returns the location of a king in check or checkmate """
-        for color in ('white', 'black'):
-            if self.board.in_checkmate(color):
-                return [self.board.king_loc(color), 'mate']
-            elif self.board.in_check(color):
-                return [self.board.king_loc(color), 'check']
+        with self.board_lock:
+            for color in ('white', 'black'):
+                status = self.board.status(color)
+                if status['checkmate']:
+                    return [self.board.king_loc(color), 'mate']
+                elif status['check']:
+                    return [self.board.king_loc(color), 'check']
         return [(-1, -1), 'safe']
 
     def game_loop(self):
@@ -132,7 +156,9 @@ class GameManager:
                 if self.winner is not None:
                     break
 
-                if self.board.is_stalemate(color) or self.board_log.get_draw_status():
+                with self.board_lock:
+                    stalemate = self.board.status(color)['stalemate']
+                if stalemate or self.board_log.get_draw_status():
                     # Check for draws
                     self.winner = 'draw'
                 else:
@@ -153,11 +179,14 @@ class GameManager:
                         self.board_to_log = deepcopy(self.board)
 
                 # Check for win
-                if self.board.in_checkmate(self.board.opposite_color(color)):
+                with self.board_lock:
+                    checkmate = self.board.status(self.board.opposite_color(color))['checkmate']
+                if checkmate:
                     self.winner = color
                     if self.lan_match:
                         self.network_manager.send_data('game over')
                     print(f'Winner: {self.winner}')
+        self.bot.stop_pondering()
         # Commit log in background
         self.commit_thread = threading.Thread(target=self.commit_log, daemon=True)
         self.commit_thread.start()
@@ -168,6 +197,8 @@ class GameManager:
         """ Ends game loop with interrupt flag """
         self.game_loop_interrupt = True
         self.waiting_on_move = False
+        self.bot_cancel.set()
+        self.bot.stop_pondering()
         if self.lan_listen_thread is not None and self.lan_listen_thread.is_alive():
             self.lan_listen_thread.join()
 
@@ -201,7 +232,9 @@ class GameManager:
             except Empty:
                 continue
 
-            if self.board.move_piece(*move):
+            with self.board_lock:
+                moved = self.board.move_piece(*move)
+            if moved:
                 self.waiting_on_move = False
 
                 # Send data to opposing player
@@ -221,7 +254,9 @@ class GameManager:
                 move = self.lan_opp_queue.get(timeout=1)
             except Empty:
                 continue
-            if self.board.move_piece(*move):
+            with self.board_lock:
+                moved = self.board.move_piece(*move)
+            if moved:
                 self.waiting_on_move = False
 
         return None if move == [] else move
@@ -268,25 +303,45 @@ class GameManager:
             self.lan_opp_queue.put(move)
 
     def bot_move(self, color):
-        """ Returns bot generated move """
-        if self.bot_delay > 0:
-            sleep(self.bot_delay)
+        """ Returns bot generated move, or None if the game loop was interrupted """
+        # waiting on the event instead of sleeping lets interrupt_game_loop end the delay at once
+        if self.bot_delay > 0 and self.bot_cancel.wait(self.bot_delay):
+            return None
+        deadline = time() + self.bot_move_time
         while True:
-            move = self.bot.decide_move(self.board, color)
-            if self.board.move_piece(*move):
+            # the bot plays trial moves on its own copy so the live board is never touched while it thinks
+            with self.board_lock:
+                board = deepcopy(self.board)
+            move = self.bot.decide_move(board, color, deadline=deadline, cancel_event=self.bot_cancel)
+            if move is None or self.bot_cancel.is_set():
+                return None
+            with self.board_lock:
+                moved = self.board.move_piece(*move)
+            if moved:
                 break
+        if self.get_player_type(self.board.opposite_color(color)) != 'bot':
+            # think about the expected reply while player_move or lan_move waits for it; the bot's copy gets
+            # the move so pondering, which may wait for the previous ponder search, runs without the lock
+            board.make_move(*move)
+            self.bot.ponder(board, color)
         return move
 
     def reset(self):
         """ Resets board, winner, logs """
+        self.bot.stop_pondering()
         self.winner = None
-        self.board = Board()
+        self.board = self.board_class()
         self.turn = 'white'
         self.game_loop_interrupt = False
+        self.bot_cancel.clear()
         self.waiting_on_move = False
         self.board_log = BoardLog()
         self.board_to_log = deepcopy(self.board)
 
+    def close(self):
+        """ Stops the bot's background processes; call once the game manager is no longer used """
+        self.bot.close()
+
     def __str__(self):
         return (f'*G*{self.turn}:{self.winner}:{self.white_player_type}:{self.black_player_type}\n'
                 f'*M*{self.move_queue.empty()}:{self.lan_opp_queue.empty()}:{self.waiting_on_move}:{self.game_loop_interrupt}')
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """ Bounded key/value store that evicts the least recently used entry once max_size is reached.
+        With ttl set, entries also expire ttl seconds after they are stored.
+        Counts hits and misses so the size can be tuned. Safe to share between threads """
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """ Returns the value stored for key, or default on a miss """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None:
+                # entries are stored with their expiry time when there is a ttl
+                value, expires = value
+                if time.monotonic() >= expires:
+                    del self._entries[key]
+                    self.misses += 1
+                    return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """ Stores value for key, evicting the least recently used entry when full """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value if self.ttl is None else (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """ Drops the entry for key, if any """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def set_max_size(self, max_size):
+        """ Changes the size limit, evicting old entries if needed. 0 disables the cache """
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def stats(self):
+        return {'size': len(self._entries), 'max_size': self.max_size,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate()}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
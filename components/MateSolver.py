@@ -0,0 +1,121 @@
+"""
+Mate-in-N solver over forcing lines.
+Only checking moves are tried for the attacker, while the defender gets every legal reply, so the tree
+stays small enough to search before every bot move. Depths are tried one at a time (mate in 1, then in
+2, ...) so the shortest mate is found first. Checks are tried in order of how few replies they leave,
+the proof-number idea of expanding the node that is cheapest to prove first. Results for attacker
+positions go into a small hash of their own; a proven or disproven mate does not depend on the search
+that found it, so the hash is kept between calls.
+"""
+import time
+
+from components.Board import decode_move, move_name, ZOBRIST_BLACK_TO_MOVE
+from components.Search import SearchAborted
+
+# hash entry: (mate proven in this many moves or NOT_PROVEN, mating move, no mate in this many moves)
+NOT_PROVEN = 1 << 30
+
+
+class MateSolver:
+    """ Finds forced mates for the side to move within max_mate moves and a node budget """
+
+    def __init__(self, max_mate=3, node_limit=20000, hash_size=1 << 16):
+        self.max_mate = max_mate
+        self.node_limit = node_limit
+        self.hash_size = hash_size
+        self.table = {}
+        self.nodes = 0
+        self.board = None
+        self._side_key = 0
+        self._deadline = None
+        self._stop_event = None
+
+    def solve(self, board, color, deadline=None, stop_event=None):
+        """ Returns {'move', 'mate_in', 'nodes', 'pv'} for the shortest mate color can force, or None when
+            there is none within max_mate moves or the budget, the time.time() deadline or stop_event runs
+            out first. board is searched in place and left as it was """
+        self.board = board
+        self.nodes = 0
+        self._deadline = deadline
+        self._stop_event = stop_event
+        # keys must tell whose turn it is even if the board's side_to_move was never set for color
+        self._side_key = 0 if board.side_to_move == color else ZOBRIST_BLACK_TO_MOVE
+        opponent = board.opposite_color(color)
+        try:
+            for mate_in in range(1, self.max_mate + 1):
+                move = self._attack(mate_in, color, opponent)
+                if move:
+                    return {'move': decode_move(move), 'mate_in': mate_in, 'nodes': self.nodes,
+                            'pv': [move_name(move)]}
+        except SearchAborted:
+            pass
+        return None
+
+    def _check_budget(self):
+        self.nodes += 1
+        if self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.nodes & 255 == 0:
+            if self._deadline is not None and time.time() >= self._deadline:
+                raise SearchAborted()
+            if self._stop_event is not None and self._stop_event.is_set():
+                raise SearchAborted()
+
+    def _store(self, key, proven, move, disproven):
+        if len(self.table) >= self.hash_size:
+            # a full hash starts over rather than paying for replacement bookkeeping on every store
+            self.table.clear()
+        self.table[key] = (proven, move, disproven)
+
+    def _attack(self, mate_in, color, opponent):
+        """ Packed move that mates within mate_in moves, or 0 """
+        self._check_budget()
+        board = self.board
+        key = board.zobrist_key ^ self._side_key
+        proven, proven_move, disproven = self.table.get(key, (NOT_PROVEN, 0, 0))
+        if proven <= mate_in:
+            return proven_move
+        if disproven >= mate_in:
+            return 0
+
+        # every check, with the number of replies it leaves
+        checks = []
+        for move in board.generate_legal_moves(color, use_cache=False):
+            undo = board.make_move(*decode_move(move))
+            try:
+                if board.in_check(opponent):
+                    replies = len(board.generate_legal_moves(opponent, use_cache=False))
+                    if replies == 0:
+                        self._store(key, 1, move, disproven)
+                        return move
+                    checks.append((replies, move))
+            finally:
+                board.unmake_move(undo)
+
+        if mate_in > 1:
+            checks.sort()
+            for _, move in checks:
+                undo = board.make_move(*decode_move(move))
+                try:
+                    mates = self._defend(mate_in - 1, opponent, color)
+                finally:
+                    board.unmake_move(undo)
+                if mates:
+                    self._store(key, mate_in, move, disproven)
+                    return move
+        self._store(key, proven, proven_move, mate_in)
+        return 0
+
+    def _defend(self, mate_in, color, attacker):
+        """ True if every reply of color (in check) still leaves attacker a mate within mate_in moves """
+        self._check_budget()
+        board = self.board
+        for move in board.generate_legal_moves(color, use_cache=False):
+            undo = board.make_move(*decode_move(move))
+            try:
+                mates = self._attack(mate_in, attacker, color)
+            finally:
+                board.unmake_move(undo)
+            if not mates:
+                return False
+        return True
@@ -0,0 +1,95 @@
+"""
+Move ordering for the bot's move loops and the search.
+Moves are tried in the order most likely to be best so that alpha-beta cutoffs and early-exit loops
+stop sooner: the hash move, then captures and promotions by MVV-LVA (most valuable victim, least
+valuable attacker), then the killer moves that caused cutoffs at the same ply, then quiet moves by a
+history score that grows every time the move causes a cutoff and decays between decisions.
+"""
+from components.Board import MOVE_PROMOTION, MOVE_EN_PASSANT
+
+MAX_PLY = 128
+# victim and attacker ranks for MVV-LVA
+PIECE_RANKS = {'p': 1, 'n': 2, 'b': 3, 'r': 4, 'q': 5, 'k': 6}
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 23, (1 << 23) - 1)
+# history scores are halved whenever one passes this, keeping quiet moves below the killers
+HISTORY_LIMIT = 1 << 22
+
+
+class MoveOrdering:
+    """ Ranks packed moves; keep one instance per bot so killers and history carry between searches """
+
+    def __init__(self, max_ply=MAX_PLY):
+        self.killers = [[0, 0] for _ in range(max_ply + 1)]
+        # history[color][from square | to square << 6]
+        self.history = {'white': [0] * 4096, 'black': [0] * 4096}
+
+    def order(self, board, moves, ply=0, hash_move=0):
+        """ Returns a new list of the moves, most promising first """
+        killers = self.killers[ply] if ply < len(self.killers) else (0, 0)
+        scored = []
+        for move in moves:
+            if move == hash_move:
+                score = HASH_MOVE_SCORE
+            elif self.is_tactical(board, move):
+                score = CAPTURE_SCORE + self.mvv_lva(board, move)
+            elif move == killers[0]:
+                score = KILLER_SCORES[0]
+            elif move == killers[1]:
+                score = KILLER_SCORES[1]
+            else:
+                from_sq = move & 63
+                color = 'white' if board.get_piece(from_sq >> 3, from_sq & 7).isupper() else 'black'
+                score = self.history[color][move & 4095]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    @staticmethod
+    def is_tactical(board, move):
+        """ True for captures and promotions, the moves ordered by MVV-LVA """
+        to_sq = move >> 6 & 63
+        return board.get_piece(to_sq >> 3, to_sq & 7) != '' or move >> 14 in (MOVE_PROMOTION, MOVE_EN_PASSANT)
+
+    @staticmethod
+    def mvv_lva(board, move):
+        from_sq, to_sq = move & 63, move >> 6 & 63
+        target = board.get_piece(to_sq >> 3, to_sq & 7)
+        victim = PIECE_RANKS[target.lower()] if target != '' else PIECE_RANKS['p']
+        if move >> 14 == MOVE_PROMOTION:
+            victim += PIECE_RANKS['q'] if move >> 12 & 3 == 3 else 0
+        attacker = PIECE_RANKS[board.get_piece(from_sq >> 3, from_sq & 7).lower()]
+        return victim * 8 - attacker
+
+    def add_cutoff(self, board, move, ply, depth):
+        """ Records a quiet move that caused a beta cutoff """
+        if self.is_tactical(board, move):
+            return
+        if ply < len(self.killers) and self.killers[ply][0] != move:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move
+        from_sq = move & 63
+        color = 'white' if board.get_piece(from_sq >> 3, from_sq & 7).isupper() else 'black'
+        history = self.history[color]
+        history[move & 4095] += depth * depth
+        if history[move & 4095] > HISTORY_LIMIT:
+            self._halve_history()
+
+    def decay(self):
+        """ Halves the history scores and forgets the killers, e.g. between decisions """
+        self._halve_history()
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+
+    def copy(self):
+        """ Independent copy of the killers and history, for a thread that must not touch this instance """
+        ordering = MoveOrdering(len(self.killers) - 1)
+        ordering.killers = [list(killers) for killers in self.killers]
+        ordering.history = {color: list(history) for color, history in self.history.items()}
+        return ordering
+
+    def _halve_history(self):
+        for color, history in self.history.items():
+            self.history[color] = [score >> 1 for score in history]
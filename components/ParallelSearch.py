@@ -0,0 +1,157 @@
+"""
+Root-split search over a pool of worker processes.
+The legal moves at the root are ordered, dealt round-robin to the workers and each worker runs an
+iterative deepening Search over its share with the full time budget. Scores from every worker are
+compared at the deepest depth all of them completed, so the chosen move does not depend on which
+worker finished first. Processes are used rather than threads because the search is pure Python and
+threads would serialize on the GIL. The workers share one SharedTranspositionTable, so a position one
+worker has searched is a hash hit for the others and results carry over to the next search.
+Results report the workers' CPU utilisation and, once a one-worker baseline is known (baseline_nps, or
+measured by measure_baseline), the speedup in total nodes/s over it.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from components.Board import decode_move, move_name
+from components.MoveOrdering import MoveOrdering
+from components.Search import Search, MAX_PLY, MATE_SCORE
+from components.TranspositionTable import SharedTranspositionTable
+
+# set in each worker process by _init_worker
+_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _warm_up():
+    """ Runs in a worker; unpickling it imports the search modules there """
+    return os.getpid()
+
+
+def _search_share(board, color, root_moves, max_depth, node_limit, deadline, transposition_table):
+    """ Runs in a worker: searches some of the root moves and reports every completed iteration.
+        transposition_table arrives attached to the parent's shared block """
+    cpu_start = time.process_time()
+    time_limit = None if deadline is None else max(deadline - time.time(), 0.001)
+    search = Search(board, max_depth=max_depth, node_limit=node_limit, time_limit=time_limit,
+                    transposition_table=transposition_table, stop_event=_stop_event)
+    try:
+        result = search.search(color, root_moves)
+    finally:
+        transposition_table.close()
+    return {'iterations': search.iterations, 'nodes': result['nodes'], 'cpu_time': time.process_time() - cpu_start,
+            'fallback': result}
+
+
+class ParallelSearch:
+    """ Spreads the root moves of a search over worker processes. The workers are started here, so the
+        first search does not pay for spawning them. Call close() to stop the workers and, unless
+        transposition_table was passed in, free the shared table """
+
+    def __init__(self, workers=None, hash_mb=16, transposition_table=None, baseline_nps=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.owns_table = transposition_table is None
+        self.transposition_table = SharedTranspositionTable(hash_mb) if self.owns_table else transposition_table
+        # nodes/s of a one-worker search on this machine, the reference for 'speedup'
+        self.baseline_nps = baseline_nps
+        # set to stop every worker's search; workers receive it when they start
+        self._stop_event = multiprocessing.get_context('spawn').Event()
+        self._executor = None
+        if self.workers > 1:
+            self.warm_up()
+
+    def warm_up(self):
+        """ Starts every worker process and waits until each has imported the search """
+        executor = self._get_executor()
+        # tasks submitted together each get a process of their own
+        for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def measure_baseline(self, board, color, time_limit=1.0):
+        """ Sets baseline_nps from a one-worker search of board in this process and returns it """
+        result = Search(board, time_limit=time_limit).search(color)
+        self.baseline_nps = result['nps'] if result is not None else None
+        return self.baseline_nps
+
+    def search(self, board, color, max_depth=MAX_PLY, node_limit=None, time_limit=None, stop_event=None):
+        """ Returns the Search result keys plus 'workers', 'cpu_utilisation' (CPU seconds the workers used per
+            second of the search, so at most workers) and 'speedup' (total nodes/s over baseline_nps, None
+            without a baseline), or None when color has no legal moves. node_limit is shared out.
+            Setting stop_event (a threading.Event) stops the workers as Search does """
+        start = time.perf_counter()
+        legal_moves = board.generate_legal_moves(color)
+        if len(legal_moves) == 0:
+            return None
+        workers = min(self.workers, len(legal_moves))
+        if workers <= 1:
+            result = Search(board, max_depth=max_depth, node_limit=node_limit, time_limit=time_limit,
+                            transposition_table=self.transposition_table, stop_event=stop_event).search(color)
+            result.update({'workers': 1, 'cpu_utilisation': 1.0,
+                           'speedup': result['nps'] / self.baseline_nps if self.baseline_nps else None})
+            return result
+
+        moves = MoveOrdering().order(board, legal_moves)
+        shares = [moves[worker::workers] for worker in range(workers)]
+        deadline = None if time_limit is None else time.time() + time_limit
+        share_nodes = None if node_limit is None else max(node_limit // workers, 1)
+        # workers cannot age the shared table themselves (see SharedTranspositionTable.new_search)
+        self.transposition_table.new_search()
+        self._stop_event.clear()
+        futures = [self._get_executor().submit(_search_share, board, color, share, max_depth, share_nodes,
+                                               deadline, self.transposition_table) for share in shares]
+        # pass a stop on to the workers, which cannot see a threading.Event
+        while stop_event is not None and wait(futures, timeout=0.005).not_done:
+            if stop_event.is_set():
+                self._stop_event.set()
+                break
+        reports = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        result = self._combine(reports, moves)
+        nodes = sum(report['nodes'] for report in reports)
+        cpu_time = sum(report['cpu_time'] for report in reports)
+        nps = nodes / elapsed if elapsed > 0 else 0
+        result.update({'nodes': nodes, 'time': elapsed, 'nps': nps, 'workers': workers,
+                       'cpu_utilisation': cpu_time / elapsed if elapsed > 0 else 0.0,
+                       'speedup': nps / self.baseline_nps if self.baseline_nps else None})
+        return result
+
+    @staticmethod
+    def _combine(reports, moves):
+        """ Picks the best move at the deepest depth every worker completed. A worker that stopped early
+            on a mate score keeps that score at every deeper depth. Ties go to the earlier ordered move """
+        finished = [report for report in reports if report['iterations']]
+        if not finished:
+            return dict(reports[0]['fallback'], move=decode_move(moves[0]), score=0, depth=0,
+                        pv=[move_name(moves[0])])
+        unfinished_depths = [report['iterations'][-1]['depth'] for report in finished
+                             if abs(report['iterations'][-1]['score']) < MATE_SCORE - MAX_PLY]
+        depth = min(unfinished_depths) if unfinished_depths else max(report['iterations'][-1]['depth']
+                                                                       for report in finished)
+        candidates = []
+        for report in finished:
+            iterations = [iteration for iteration in report['iterations'] if iteration['depth'] <= depth]
+            if iterations:
+                candidates.append(iterations[-1])
+        names = [move_name(move) for move in moves]
+        best = max(candidates, key=lambda iteration: (iteration['score'], -names.index(iteration['pv'][0])))
+        return {'move': best['move'], 'score': best['score'], 'depth': depth, 'pv': best['pv']}
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn rather than fork: the game runs other threads, which fork would copy mid-operation
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker, initargs=(self._stop_event,))
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        if self.owns_table:
+            self.transposition_table.unlink()
@@ -0,0 +1,114 @@
+"""
+Perft (performance test) for the move generators.
+Counts the leaf nodes of the legal move tree to a fixed depth, bypassing the move cache. The counts for the reference positions
+below are published and exact, so any difference means a move generation bug, and the time taken
+is the throughput benchmark for Board and BitBoard.
+
+Usage:
+    python -m components.Perft                      # check every reference position
+    python -m components.Perft --depth 4 --divide   # per root move breakdown of the start position
+    python -m components.Perft --fen "<fen>" --depth 3 --engine array
+"""
+import argparse
+import time
+
+from components.BitBoard import BitBoard
+from components.Board import Board, decode_move, move_name
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# (name, fen, leaf counts for depth 1, 2, ...)
+REFERENCE_POSITIONS = [
+    ('start', START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467, 422333]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+ENGINES = {'array': Board, 'bitboard': BitBoard}
+
+
+def perft(board, depth, color):
+    """ Returns the number of leaf nodes depth plies below the position """
+    moves = board.generate_legal_moves(color, use_cache=False)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    opponent = board.opposite_color(color)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(*decode_move(move))
+        nodes += perft(board, depth - 1, opponent)
+        board.unmake_move(undo)
+    return nodes
+
+
+def divide(board, depth, color):
+    """ Returns {move name: leaf nodes} for each root move """
+    opponent = board.opposite_color(color)
+    counts = {}
+    for move in board.generate_legal_moves(color):
+        undo = board.make_move(*decode_move(move))
+        counts[move_name(move)] = perft(board, depth - 1, opponent)
+        board.unmake_move(undo)
+    return counts
+
+
+def run(board_class, fen, depth):
+    """ Runs perft on a position and returns (nodes, seconds) """
+    board = board_class.from_fen(fen)
+    start = time.perf_counter()
+    nodes = perft(board, depth, board.side_to_move)
+    return nodes, time.perf_counter() - start
+
+
+def check_reference(board_class, max_nodes=100000, verbose=True):
+    """ Runs every reference position to the deepest depth with at most max_nodes leaves.
+        Returns a list of (name, depth, expected, actual) for every mismatch """
+    failures = []
+    total_nodes, total_time = 0, 0
+    for name, fen, counts in REFERENCE_POSITIONS:
+        depth = max([1] + [index + 1 for index, count in enumerate(counts) if count <= max_nodes])
+        nodes, seconds = run(board_class, fen, depth)
+        total_nodes += nodes
+        total_time += seconds
+        if nodes != counts[depth - 1]:
+            failures.append((name, depth, counts[depth - 1], nodes))
+        if verbose:
+            status = 'ok' if nodes == counts[depth - 1] else f'FAILED (expected {counts[depth - 1]})'
+            print(f'{name:<12} depth {depth}: {nodes:>9} nodes {nodes / seconds:>10.0f} nodes/s  {status}')
+    if verbose:
+        print(f'{board_class.__name__}: {total_nodes} nodes in {total_time:.2f}s '
+              f'({total_nodes / total_time:.0f} nodes/s), {len(failures)} failures')
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count and time legal move tree leaf nodes')
+    parser.add_argument('--fen', help='position to search (defaults to the start position)')
+    parser.add_argument('--depth', type=int, help='plies to search; without it the reference positions are checked')
+    parser.add_argument('--divide', action='store_true', help='print the leaf count below each root move')
+    parser.add_argument('--engine', choices=ENGINES, default='bitboard')
+    parser.add_argument('--max-nodes', type=int, default=100000,
+                        help='deepest reference depth to check, by leaf count')
+    args = parser.parse_args()
+
+    engine = ENGINES[args.engine]
+    if args.depth is None:
+        if check_reference(engine, args.max_nodes):
+            raise SystemExit(1)
+    else:
+        position = engine.from_fen(args.fen or START_FEN)
+        start_time = time.perf_counter()
+        if args.divide:
+            root_counts = divide(position, args.depth, position.side_to_move)
+            for root_move, count in sorted(root_counts.items()):
+                print(f'{root_move}: {count}')
+            leaf_nodes = sum(root_counts.values())
+        else:
+            leaf_nodes = perft(position, args.depth, position.side_to_move)
+        elapsed = time.perf_counter() - start_time
+        print(f'Nodes: {leaf_nodes}  Time: {elapsed:.2f}s  Nodes/s: {leaf_nodes / elapsed:.0f}')
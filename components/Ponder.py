@@ -0,0 +1,112 @@
+"""
+Pondering: searching on the opponent's time.
+After the bot moves, the reply its search expects is played on a copy of the board and the resulting
+position is searched in a background process until the opponent actually moves. The search writes into
+the bot's SharedTranspositionTable, so after a ponder hit (the opponent played the expected reply) the
+bot's own search starts from a warm table, and the pondered result is played as is once it has had the
+bot's full time. After a ponder miss the search is stopped and its result dropped.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+
+from components.Board import decode_move
+from components.Search import Search, MAX_PLY
+
+# set in the worker process by _init_worker
+_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _ponder(board, color, max_depth, transposition_table):
+    """ Runs in the worker: searches until stopped, then returns the deepest completed iteration """
+    search = Search(board, max_depth=max_depth, transposition_table=transposition_table, stop_event=_stop_event)
+    try:
+        return search.search(color)
+    finally:
+        transposition_table.close()
+
+
+class Ponderer:
+    """ Runs one ponder search at a time in a worker process. Call close() to stop the worker """
+
+    def __init__(self, transposition_table, max_depth=MAX_PLY):
+        self.transposition_table = transposition_table
+        self.max_depth = max_depth
+        context = multiprocessing.get_context('spawn')
+        self._stop_event = context.Event()
+        self._executor = None
+        self._future = None
+        # the game thread finishes pondering while the GUI thread may stop it
+        self._lock = threading.RLock()
+        # zobrist key of the position being pondered and the reply that leads to it
+        self.key = None
+        self.reply = None
+        self._start = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, board, color, reply):
+        """ Ponders the position after the opponent plays the packed move reply, searching for color.
+            board is the position after the bot's move and is not changed """
+        board = deepcopy(board)
+        board.make_move(*decode_move(reply))
+        with self._lock:
+            self.stop()
+            self.key = board.zobrist_key
+            self.reply = reply
+            self._stop_event.clear()
+            self._start = time.perf_counter()
+            self._future = self._get_executor().submit(_ponder, board, color, self.max_depth,
+                                                       self.transposition_table)
+
+    def finish(self, board):
+        """ Stops pondering. Returns the ponder result with 'time' spent if board is the pondered position
+            (a ponder hit), otherwise None """
+        with self._lock:
+            if self._future is None:
+                return None
+            hit = board.zobrist_key == self.key
+            result = self.stop()
+            if not hit or result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            result['time'] = time.perf_counter() - self._start
+            return result
+
+    def stop(self):
+        """ Stops the ponder search and waits for it; returns its result, or None if none was running """
+        with self._lock:
+            if self._future is None:
+                return None
+            self._stop_event.set()
+            future, self._future, self.key = self._future, None, None
+            try:
+                return future.result()
+            except Exception as e:
+                print(f'Ponder search failed: {e}')
+                return None
+
+    def is_pondering(self):
+        return self._future is not None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn rather than fork, as in ParallelSearch; the event reaches the worker when it starts
+            self._executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker, initargs=(self._stop_event,))
+        return self._executor
+
+    def close(self):
+        with self._lock:
+            self.stop()
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
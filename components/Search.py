@@ -0,0 +1,210 @@
+"""
+Negamax alpha-beta search with iterative deepening.
+Each iteration searches one ply deeper than the last, starting from the previous best move, until the
+node or time budget runs out. Leaves are resolved by a quiescence search over captures and promotions,
+skipping captures that lose material by static exchange, so no line stops in the middle of an exchange.
+The result of the deepest completed iteration is returned, so the cost of a move is bounded by the
+budget rather than by the position.
+"""
+import time
+
+from components.Board import decode_move, move_name, ZOBRIST_BLACK_TO_MOVE, MOVE_PROMOTION
+from components.MoveOrdering import MoveOrdering
+from components.TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+
+MATE_SCORE = 100000
+MAX_PLY = 128
+
+
+class SearchAborted(Exception):
+    """ Raised inside the tree when the node or time budget is spent or the search is stopped """
+
+
+def score_to_table(score, ply):
+    """ Mate scores are stored as distance from the stored position rather than from the root """
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class Search:
+    """ Searches a board in place; every trial move is taken back before search returns """
+
+    def __init__(self, board, max_depth=MAX_PLY, node_limit=None, time_limit=None, transposition_table=None,
+                 move_ordering=None, stop_event=None):
+        self.board = board
+        self.max_depth = max_depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        # a threading or multiprocessing Event; once set the search returns its deepest completed iteration
+        self.stop_event = stop_event
+        # pass a table to keep results between searches; a small private one is used otherwise
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable(1)
+        self.move_ordering = move_ordering if move_ordering is not None else MoveOrdering(MAX_PLY)
+        self.nodes = 0
+        self._deadline = None
+        self._side_key = 0
+        self._root_best = 0
+        self._restricted_root = False
+        self._pv = [[] for _ in range(MAX_PLY + 1)]
+        # {'depth', 'move', 'score', 'pv'} of every completed iteration of the last search
+        self.iterations = []
+
+    def search(self, color, root_moves=None):
+        """ Returns {'move', 'score', 'depth', 'nodes', 'time', 'nps', 'pv'} for the deepest completed iteration,
+            or None when color has no legal moves. score is in centipawns for color.
+            root_moves limits the search to some of the legal moves, e.g. to split it between processes """
+        start = time.perf_counter()
+        self.nodes = 0
+        self._deadline = None if self.time_limit is None else start + self.time_limit
+        # keys must tell whose turn it is even if the board's side_to_move was never set for color
+        self._side_key = 0 if self.board.side_to_move == color else ZOBRIST_BLACK_TO_MOVE
+        self.transposition_table.new_search()
+        legal_moves = self.board.generate_legal_moves(color)
+        root_moves = legal_moves if root_moves is None else [move for move in legal_moves if move in root_moves]
+        if len(root_moves) == 0:
+            return None
+        # a score over part of the root moves is not the score of the position, so it is not stored
+        self._restricted_root = len(root_moves) != len(legal_moves)
+        self._root_best = 0
+        self.iterations = []
+
+        result = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score = self._negamax(depth, -MATE_SCORE - 1, MATE_SCORE + 1, color, 0, root_moves)
+            except SearchAborted:
+                break
+            pv = self._pv[0]
+            result = {'move': decode_move(pv[0]), 'score': score, 'depth': depth, 'nodes': self.nodes,
+                      'time': time.perf_counter() - start, 'nps': 0, 'pv': [move_name(move) for move in pv]}
+            self.iterations.append({'depth': depth, 'move': result['move'], 'score': score, 'pv': result['pv']})
+            # search the best move first next iteration
+            self._root_best = pv[0]
+            if abs(score) >= MATE_SCORE - MAX_PLY or (self.stop_event is not None and self.stop_event.is_set()):
+                break
+            # the next iteration takes several times longer, so do not start one that cannot finish
+            if self._deadline is not None and time.perf_counter() - start > self.time_limit / 2:
+                break
+
+        if result is None:
+            # not even one ply fit in the budget
+            result = {'move': decode_move(root_moves[0]), 'score': 0, 'depth': 0, 'nodes': self.nodes,
+                      'time': time.perf_counter() - start, 'nps': 0, 'pv': [move_name(root_moves[0])]}
+        result['time'] = time.perf_counter() - start
+        result['nodes'] = self.nodes
+        result['nps'] = self.nodes / result['time'] if result['time'] > 0 else 0
+        return result
+
+    def _check_budget(self):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self.nodes & 255 == 0:
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                raise SearchAborted()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchAborted()
+
+    def _negamax(self, depth, alpha, beta, color, ply, moves=None):
+        """ Score of the position for color, searched depth plies deep within the (alpha, beta) window """
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(alpha, beta, color, ply)
+        self.nodes += 1
+        self._check_budget()
+        self._pv[ply] = []
+
+        key = self.board.zobrist_key ^ self._side_key
+        entry = self.transposition_table.probe(key)
+        hash_move = self._root_best if ply == 0 else 0
+        if entry is not None and hash_move == 0:
+            hash_move, score, entry_depth, bound = entry
+            if ply > 0 and entry_depth >= depth:
+                score = score_from_table(score, ply)
+                if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                    self._pv[ply] = [hash_move] if hash_move else []
+                    return score
+
+        if moves is None:
+            moves = self.board.generate_legal_moves(color, use_cache=False)
+        if len(moves) == 0:
+            # checkmate scores prefer the shortest mate
+            return -MATE_SCORE + ply if self.board.in_check(color) else 0
+        moves = self.move_ordering.order(self.board, moves, ply, hash_move)
+
+        opponent = self.board.opposite_color(color)
+        alpha_start = alpha
+        best_score, best_move = -MATE_SCORE - 1, 0
+        for move in moves:
+            undo = self.board.make_move(*decode_move(move))
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, opponent, ply + 1)
+            finally:
+                self.board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                    if alpha >= beta:
+                        self.move_ordering.add_cutoff(self.board, move, ply, depth)
+                        break
+
+        if ply > 0 or not self._restricted_root:
+            bound = LOWER if best_score >= beta else (EXACT if best_score > alpha_start else UPPER)
+            self.transposition_table.store(key, best_move, score_to_table(best_score, ply), depth, bound)
+        return best_score
+
+    def _quiescence(self, alpha, beta, color, ply):
+        """ Searches captures and promotions until the position is quiet. In check every evasion is searched """
+        self.nodes += 1
+        self._check_budget()
+        # checks can go on for as long as evasions do, so the ply cap applies in and out of check
+        if ply >= MAX_PLY:
+            return self.board.evaluate(color)
+        self._pv[ply] = []
+        in_check = self.board.in_check(color)
+        if in_check:
+            best_score = -MATE_SCORE + ply
+        else:
+            # standing pat: the side to move may decline every capture
+            best_score = self.board.evaluate(color)
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+
+        moves = self.board.generate_legal_moves(color, use_cache=False)
+        if in_check and len(moves) == 0:
+            return best_score
+        opponent = self.board.opposite_color(color)
+        for move in self.move_ordering.order(self.board, moves, ply):
+            if not in_check:
+                if not self.move_ordering.is_tactical(self.board, move):
+                    # tactical moves are ordered first, so the rest are quiet
+                    break
+                from_row, from_col, to_row, to_col = decode_move(move)[:4]
+                if move >> 14 != MOVE_PROMOTION and self.board.static_exchange(from_row, from_col, to_row, to_col) < 0:
+                    continue
+            undo = self.board.make_move(*decode_move(move))
+            try:
+                score = -self._quiescence(-beta, -alpha, opponent, ply + 1)
+            finally:
+                self.board.unmake_move(undo)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    self._pv[ply] = [move] + self._pv[ply + 1]
+                    if alpha >= beta:
+                        break
+        return best_score
@@ -0,0 +1,177 @@
+"""
+Fixed-size transposition table keyed by Zobrist key.
+Entries live in one flat array of 64-bit ints rather than a dict of objects: each entry is a check word
+followed by a data word packing the best move, score, depth, bound type and the search generation that
+stored it. The check word is the key XOR the data, so an entry whose two words were written by different
+stores does not verify and reads as a miss; this lets SharedTranspositionTable skip locking.
+Entries are grouped in buckets of two slots. The first slot keeps the deepest result (or any result
+once it is from an older search) and the second is always replaced, so deep results survive while
+recent ones are still found.
+"""
+from array import array
+from multiprocessing import shared_memory
+
+# bound types: the stored score is exact, a lower bound (fail high) or an upper bound (fail low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2
+SCORE_OFFSET = 1 << 31
+GENERATIONS = 64
+
+
+def pack_entry(move, score, depth, bound, generation):
+    """ Packs an entry into a data word: move 16 bits, score 32, depth 8, bound 2, generation 6 """
+    return (move | (score + SCORE_OFFSET) << 16 | min(max(depth, 0), 255) << 48 |
+            bound << 56 | generation << 58)
+
+
+def unpack_entry(data):
+    """ Returns (move, score, depth, bound) from a data word """
+    return data & 0xFFFF, (data >> 16 & 0xFFFFFFFF) - SCORE_OFFSET, data >> 48 & 0xFF, data >> 56 & 3
+
+
+class TranspositionTable:
+    """ Bounded store of search results with depth-preferred and always-replace slots """
+
+    def __init__(self, size_mb=16):
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """ Reallocates the table to fit in size_mb megabytes, dropping every entry """
+        self.size_mb = size_mb
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+        # per slot: key ^ data word then data word
+        self.table = array('Q', bytes(self.buckets * SLOTS_PER_BUCKET * ENTRY_BYTES))
+
+    def clear(self):
+        self.table = array('Q', bytes(len(self.table) * 8))
+        self.generation = 0
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self):
+        """ Ages every stored entry by one search so old results give way to new ones """
+        self.generation = (self.generation + 1) % GENERATIONS
+
+    def probe(self, key):
+        """ Returns (move, score, depth, bound) stored for key, or None """
+        self.probes += 1
+        index = (key % self.buckets) * 4
+        table = self.table
+        # read each data word once, then check it against the key it was stored with
+        data = table[index + 1]
+        if data and table[index] ^ data == key:
+            self.hits += 1
+            return unpack_entry(data)
+        data = table[index + 3]
+        if data and table[index + 2] ^ data == key:
+            self.hits += 1
+            return unpack_entry(data)
+        return None
+
+    def store(self, key, move, score, depth, bound):
+        self.stores += 1
+        index = (key % self.buckets) * 4
+        table = self.table
+        generation = self.generation
+        data = pack_entry(move, score, depth, bound, generation)
+        preferred = table[index + 1]
+        same_key = preferred != 0 and table[index] ^ preferred == key
+        if same_key or preferred == 0 or preferred >> 58 != generation or depth >= preferred >> 48 & 0xFF:
+            # keep the best move of an entry being refreshed by a search that found none
+            if move == 0 and same_key:
+                data |= preferred & 0xFFFF
+            table[index], table[index + 1] = key ^ data, data
+        else:
+            table[index + 2], table[index + 3] = key ^ data, data
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes > 0 else 0.0
+
+    def fill(self, sample_buckets=1000):
+        """ Fraction of slots holding an entry from the current search, estimated from the first buckets """
+        sample = min(sample_buckets, self.buckets)
+        generation = self.generation
+        used = sum(1 for slot in range(sample * SLOTS_PER_BUCKET)
+                   if self.table[slot * 2 + 1] and self.table[slot * 2 + 1] >> 58 == generation)
+        return used / (sample * SLOTS_PER_BUCKET)
+
+    def stats(self):
+        return {'size_mb': self.size_mb, 'entries': self.buckets * SLOTS_PER_BUCKET, 'probes': self.probes,
+                'hits': self.hits, 'hit_rate': self.hit_rate(), 'stores': self.stores, 'fill': self.fill()}
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """ Transposition table in a multiprocessing.shared_memory block, shared by every process that attaches.
+        The creating process owns the block and must call unlink() when done; other processes pass
+        name to attach, or receive the table pickled (only the block name is sent). Attach from
+        processes started by the owner, whose resource tracker otherwise removes the block at exit.
+        Stores are not locked: a write interleaved with another store fails key verification and
+        reads as a miss. Probe statistics are counted per process """
+
+    HEADER_WORDS = 1
+
+    def __init__(self, size_mb=16, name=None):
+        self._shm = None
+        self._words = None
+        self.owner = name is None
+        self.name = name
+        super().__init__(size_mb)
+
+    def resize(self, size_mb):
+        """ Allocates (owner) or attaches to the block; an owner's old block is unlinked """
+        self.size_mb = size_mb
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+        size = (self.HEADER_WORDS + self.buckets * SLOTS_PER_BUCKET * 2) * 8
+        if self.owner:
+            self.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self.name = self._shm.name
+        else:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        self._words = self._shm.buf.cast('Q')
+        # the search generation lives in the header word so every process ages entries together
+        self.table = self._words[self.HEADER_WORDS:self.HEADER_WORDS + self.buckets * SLOTS_PER_BUCKET * 2]
+
+    @property
+    def generation(self):
+        return self._words[0] if self._words is not None else 0
+
+    @generation.setter
+    def generation(self, generation):
+        if self._words is not None:
+            self._words[0] = generation
+
+    def clear(self):
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+        self.probes = self.hits = self.stores = 0
+
+    def new_search(self):
+        """ Only the owner ages the table, so processes searching at the same time store one generation """
+        if self.owner:
+            super().new_search()
+
+    def close(self):
+        """ Detaches this process from the block """
+        if self._shm is not None:
+            self.table.release()
+            self._words.release()
+            self._shm.close()
+            self._shm = self._words = self.table = None
+
+    def unlink(self):
+        """ Owner only: detaches and frees the block """
+        if self._shm is not None:
+            self.close()
+            if self.owner:
+                shared_memory.SharedMemory(name=self.name).unlink()
+
+    def __getstate__(self):
+        return {'size_mb': self.size_mb, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['size_mb'], state['name'])
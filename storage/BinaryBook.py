@@ -0,0 +1,171 @@
+"""
+Compiled opening book.
+The book is a file of fixed-width 16-byte records sorted by position key, big-endian:
+key (8 bytes) Zobrist key of the position, without its en passant file
+move (2 bytes) packed like Board.encode_move
+weight (2 bytes) how often the move was seen in the sources
+learn_games, learn_points (2 bytes each) games the move was played in by the bot, and the half
+points it scored in them (a win is 2, a draw 1)
+The file is memory-mapped and searched by binary search, so opening a book of any size costs one
+mmap, and processes reading the same book share its pages through the page cache.
+Books are compiled from the SQLite book table and from PGN or line files:
+python -m storage.BinaryBook storage/bookmoves.bin storage/bookmoves.db games.pgn lines.txt
+"""
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from components.Board import Board, decode_move, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_EN_PASSANT
+from storage.BookMoveManager import BookMoveManager, board_str_to_fen
+from storage.Notation import read_games, replay
+
+BINARY_BOOK_PATH = Path(__file__).resolve().parent / 'bookmoves.bin'
+RECORD = struct.Struct('>QHHHH')
+KEY = struct.Struct('>Q')
+MAX_COUNT = 0xFFFF
+
+
+def book_key(board, color=None):
+    """ Position key used by the book, with color to move (default: the board's side to move).
+        The en passant file is left out, as the SQLite book leaves it out """
+    key = board.zobrist_key
+    if board.double_move_col is not None:
+        key ^= ZOBRIST_EN_PASSANT[board.double_move_col]
+    if color is not None and color != board.side_to_move:
+        key ^= ZOBRIST_BLACK_TO_MOVE
+    return key
+
+
+class BinaryBook:
+    """ Read access to a compiled book; with writable set, learn() updates its counters in place """
+
+    def __init__(self, path=BINARY_BOOK_PATH, writable=False):
+        self.path = Path(path)
+        self.writable = writable
+        self._file = open(self.path, 'r+b' if writable else 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.records = size // RECORD.size
+        # an empty file cannot be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ) \
+            if size > 0 else None
+
+    @classmethod
+    def open_if_exists(cls, path=BINARY_BOOK_PATH):
+        return cls(path) if Path(path).exists() else None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _first(self, key):
+        """ Index of the first record with key, or of where it would go """
+        low, high = 0, self.records
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self._map, middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find(self, key):
+        """ Yields (index, move, weight, learn_games, learn_points) of every record for key """
+        if self._map is None:
+            return
+        index = self._first(key)
+        while index < self.records:
+            record_key, move, weight, learn_games, learn_points = RECORD.unpack_from(self._map, index * RECORD.size)
+            if record_key != key:
+                return
+            yield index, move, weight, learn_games, learn_points
+            index += 1
+
+    def get_entries(self, board, color):
+        """ Returns [{'move', 'weight', 'learn_games', 'learn_points'}] for the book moves legal for color """
+        legal_moves = board.generate_legal_moves(color)
+        return [{'move': move, 'weight': weight, 'learn_games': learn_games, 'learn_points': learn_points}
+                for _, move, weight, learn_games, learn_points in self._find(book_key(board, color))
+                if move in legal_moves]
+
+    def get_moves(self, board, color):
+        """ Returns the book moves for color on board as move lists, or None """
+        entries = self.get_entries(board, color)
+        if not entries:
+            return None
+        return [decode_move(entry['move']) for entry in entries]
+
+    def learn(self, board, color, move, points):
+        """ Adds a game with points (2 win, 1 draw, 0 loss) to the learn counters of color's packed move """
+        key = book_key(board, color)
+        for index, record_move, weight, learn_games, learn_points in self._find(key):
+            if record_move == move:
+                RECORD.pack_into(self._map, index * RECORD.size, key, move, weight,
+                                 min(learn_games + 1, MAX_COUNT), min(learn_points + points, MAX_COUNT))
+                return True
+        return False
+
+    def __len__(self):
+        return self.records
+
+
+def write_book(entries, path):
+    """ Writes {(key, move): weight} as a sorted book file """
+    with open(path, 'wb') as book_file:
+        for (key, move), weight in sorted(entries.items()):
+            book_file.write(RECORD.pack(key, move, min(weight, MAX_COUNT), 0, 0))
+
+
+def entries_from_sqlite(path):
+    """ {(key, move): weight} of every move in a SQLite book table, weight 1 each """
+    entries = {}
+    for board_str, moves_by_color in BookMoveManager(path).index.items():
+        for color, moves in moves_by_color.items():
+            key = book_key(Board.from_fen(board_str_to_fen(board_str, color)))
+            for move in moves:
+                entries[key, move] = 1
+    return entries
+
+
+def entries_from_games(path, max_ply=None):
+    """ ({(key, move): weight}, rejected) from a PGN or line file. weight counts the games that played the
+        move; rejected counts games cut short by a move that could not be played """
+    entries = {}
+    rejected = 0
+    for moves in read_games(path):
+        for ply, (board, color, move) in enumerate(replay(moves)):
+            if max_ply is not None and ply >= max_ply:
+                break
+            if move is None:
+                rejected += 1
+                break
+            entries[book_key(board), move] = entries.get((book_key(board), move), 0) + 1
+    return entries, rejected
+
+
+def compile_book(sources, path=BINARY_BOOK_PATH, max_ply=None):
+    """ Builds a book from SQLite (.db) and PGN or line files. Weights add up across sources.
+        Returns the number of records written """
+    entries = {}
+    for source in sources:
+        if str(source).endswith('.db'):
+            source_entries = entries_from_sqlite(source)
+        else:
+            source_entries, rejected = entries_from_games(source, max_ply)
+            if rejected:
+                print(f'{source}: {rejected} games stopped at a move that could not be read')
+        for entry, weight in source_entries.items():
+            entries[entry] = entries.get(entry, 0) + weight
+    write_book(entries, path)
+    return len(entries)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: python -m storage.BinaryBook OUTPUT SOURCE [SOURCE ...]')
+        sys.exit(1)
+    count = compile_book(sys.argv[2:], sys.argv[1])
+    print(f'{count} records written to {sys.argv[1]}')
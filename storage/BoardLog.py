@@ -8,7 +8,7 @@ NORMAL = '\033[0m'
 class LogEntry:
     def __init__(self, board, from_row, from_col, to_row, to_col, promotion_piece=None):
         self.board = board
-        self.board_str = board.create_board_str()
+        self.key = board.zobrist_key
         self.move = [from_row, from_col, to_row, to_col]
         self.piece = board.get_piece(from_row, from_col)
         self.target = board.get_piece(to_row, to_col)
@@ -73,15 +73,15 @@ class BoardLog:
     def add_entry(self, board, from_row, from_col, to_row, to_col, promotion_piece=None):
         new_entry = LogEntry(board, from_row, from_col, to_row, to_col, promotion_piece)
         self.log.append(new_entry)
-        board_str = new_entry.board_str
+        key = new_entry.key
 
         # tracks threefold repetition
-        if board_str in self.positions_seen:
-            self.positions_seen[board_str] += 1
-            if self.positions_seen[board_str] == 3:
+        if key in self.positions_seen:
+            self.positions_seen[key] += 1
+            if self.positions_seen[key] == 3:
                 self.is_draw = True
         else:
-            self.positions_seen[board_str] = 1
+            self.positions_seen[key] = 1
 
         # tracks 50 move rule
         if new_entry.piece.lower() == 'p' or new_entry.target != '':
@@ -92,19 +92,15 @@ class BoardLog:
                 self.is_draw = True
 
         # checks for sufficient material
-        white_pieces = []
-        black_pieces = []
-        for char in new_entry.board_str:
-            if char.isupper():
-                white_pieces.append(char)
-            if char.islower():
-                black_pieces.append(char)
-        if len(white_pieces) <= 2 and all(i not in white_pieces for i in ['Q', 'R', 'P']) \
-                and len(black_pieces) <= 2 and all(i not in black_pieces for i in ['q', 'r', 'p']):
-            self.is_draw = True
-        if (white_pieces == ['K'] and black_pieces == ['k', 'n', 'n']) \
-            or (white_pieces == ['K', 'N', 'N'] and black_pieces == ['k']):
-            self.is_draw = True
+        counts = {piece: board.count_pieces(piece) for piece in 'QRPBNqrpbn'}
+        if not any(counts[piece] for piece in 'QRPqrp'):
+            white_minors = counts['B'] + counts['N']
+            black_minors = counts['b'] + counts['n']
+            if white_minors <= 1 and black_minors <= 1:
+                self.is_draw = True
+            if (white_minors == 0 and counts['n'] == 2 and counts['b'] == 0) \
+                    or (black_minors == 0 and counts['N'] == 2 and counts['B'] == 0):
+                self.is_draw = True
 
         # self.print_entry()
         # self.print_compressed_array()
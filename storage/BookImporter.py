@@ -0,0 +1,96 @@
+"""
+Bulk import of opening lines into the SQLite book table.
+Games are read from line files or PGN files (see storage/Notation.py) and replayed on a BitBoard. The
+moves seen in each position are collected in memory, so a position reached by a thousand games is
+written once. Moves are stored as SAN tagged with the side that played them (w:e4, b:Nf6), as the
+book's positions do not record the side to move (see storage/BookMoveManager.py). The merged rows go to the table with one executemany in a single transaction.
+python -m storage.BookImporter lines.txt games.pgn [--max-ply N]
+"""
+import argparse
+import re
+import sqlite3
+import time
+
+from storage.BookMoveManager import BOOK_PATH
+from storage.Notation import read_games, replay
+
+# check and annotation marks are not stored with book moves
+ANNOTATION = re.compile(r'[+#!?]+$')
+
+
+class BookImporter:
+    """ Collects positions from games and writes them to the book table in one transaction """
+
+    def __init__(self, path=BOOK_PATH, max_ply=None):
+        self.path = path
+        self.max_ply = max_ply
+        # board string -> {packed move: tagged SAN}, so a move written two ways is kept once
+        self.positions = {}
+        self.lines = 0
+        self.moves = 0
+        # (file, game number, ply, move) of every move that could not be played
+        self.rejected = []
+
+    def add_game(self, moves, source='', number=0):
+        """ Adds the positions and moves of one game, up to its first unplayable move """
+        self.lines += 1
+        for ply, (board, color, move) in enumerate(replay(moves)):
+            if self.max_ply is not None and ply >= self.max_ply:
+                return
+            if move is None:
+                self.rejected.append((source, number, ply, moves[ply]))
+                return
+            self.positions.setdefault(board.create_board_str(), {}).setdefault(
+                move, f'{color[0]}:{ANNOTATION.sub("", moves[ply])}')
+            self.moves += 1
+
+    def add_file(self, path):
+        for number, moves in enumerate(read_games(path), 1):
+            self.add_game(moves, str(path), number)
+
+    def write(self):
+        """ Merges the collected moves into the table and returns the number of rows written """
+        connection = sqlite3.connect(self.path)
+        try:
+            # the transaction commits on success and rolls back if anything fails
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS book (board_id TEXT NOT NULL PRIMARY KEY, moves TEXT)')
+                existing = dict(connection.execute('SELECT board_id, moves FROM book'))
+                rows = []
+                for board_str, moves in self.positions.items():
+                    stored = (existing.get(board_str) or '').split()
+                    merged = stored + [move for move in moves.values() if move not in stored]
+                    if len(merged) > len(stored):
+                        rows.append((board_str, ' '.join(merged)))
+                connection.executemany("""INSERT INTO book VALUES (?, ?)
+                                          ON CONFLICT(board_id) DO UPDATE SET moves = excluded.moves""", rows)
+        finally:
+            connection.close()
+        return len(rows)
+
+    def import_files(self, paths):
+        """ Reads every file, writes the book and returns a report of the import """
+        start = time.perf_counter()
+        for path in paths:
+            self.add_file(path)
+        rows = self.write()
+        seconds = time.perf_counter() - start
+        return {'lines': self.lines, 'moves': self.moves, 'positions': len(self.positions), 'rows_written': rows,
+                'rejected': len(self.rejected), 'seconds': seconds,
+                'lines_per_second': self.lines / seconds if seconds > 0 else 0.0}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import opening lines or PGN games into the book table')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--book', default=str(BOOK_PATH))
+    parser.add_argument('--max-ply', type=int, default=None, help='only import the first N moves of each game')
+    args = parser.parse_args()
+
+    importer = BookImporter(args.book, args.max_ply)
+    report = importer.import_files(args.files)
+    for source, number, ply, move in importer.rejected:
+        print(f'rejected {source} game {number} ply {ply + 1}: {move}')
+    print(f'{report["lines"]} lines, {report["moves"]} moves, {report["positions"]} positions, '
+          f'{report["rows_written"]} rows written, {report["rejected"]} rejected in {report["seconds"]:.2f}s '
+          f'({report["lines_per_second"]:.0f} lines/s)')
@@ -2,13 +2,29 @@
 Moves are stored in SQLite table.
 Table book
 Columns board_id (int primary key), moves (varchar)
+moves holds space separated moves in one of two forms, told apart token by token:
+SAN tagged with the side that played it (w:Nf3, b:exd5), written by storage/BookImporter.py (see
+storage/Notation.py); or the older lower case form convert_move reads (nf3, bxc3, 0-0). Lower case is
+never read as SAN, as bxc3 is a bishop capture there but a pawn capture in SAN. Untagged tokens with an
+upper case piece letter or O-O castles are read as SAN.
+The table is read once into an in-memory index of legal moves, packed like Board.encode_move, for each
+position and side to move, so a lookup is a dict access. The index is rebuilt when the file changes.
 * Book moves input in database are referenced from
 * Silman, J. (1998). 'The Complete Book of Chess Strategy: GrandMaster Techniques from A to Z' Siles Press
 """
+import os
 import re
 import sqlite3
+import time
 from pathlib import Path
-from components.Board import Board
+from components.Board import Board, decode_move
+from storage.Notation import parse_san
+
+BOOK_PATH = Path(__file__).resolve().parent / 'bookmoves.db'
+# seconds between checks of the book file for changes
+REFRESH_INTERVAL = 1.0
+# side tags of SAN moves written by BookImporter
+SIDE_TAGS = {'w:': 'white', 'b:': 'black'}
 
 # format of traditional chess moves (e6, qxh1, ...)
 MOVE_FORMAT = re.compile(r"""
@@ -52,9 +68,6 @@ def convert_move(board, trad_move, color):
             case _:
                 raise Exception('Invalid move cannot be converted')
 
-    for group in ('piece', 'from', 'x', 'dest', 'promotion'):
-        print(f'{group}: {match_move.group(group)}')
-
     piece = match_move.group('piece')
     if piece and color == 'white':
         piece = piece.upper()
@@ -87,17 +100,66 @@ def convert_move(board, trad_move, color):
     # Return None if nothing was found
     return None
 
+def parse_book_move(board, token, color, legal_moves):
+    """ Returns the packed move a stored token stands for when color plays it on board, or None.
+        legal_moves maps (from_row, from_col, to_row, to_col) to color's packed legal moves """
+    side = SIDE_TAGS.get(token[:2])
+    if side is not None:
+        return parse_san(board, token[2:], color) if side == color else None
+    if token != token.lower():
+        return parse_san(board, token, color)
+    try:
+        move = convert_move(board, token, color)
+    except Exception:
+        return None
+    # legacy rows do not say which side recorded a move, so a token only counts for the side whose piece it
+    # moves; being legal for that side is not enough
+    if move is None or board.get_color(board.get_piece(move[0], move[1])) != color:
+        return None
+    return legal_moves.get(tuple(move[:4]))
+
+def board_str_to_fen(board_str, color):
+    """ Expands a board string (see Board.create_board_str) into a FEN with color to move """
+    squares = []
+    i = 0
+    while len(squares) < 64:
+        if board_str[i].isdigit():
+            digits = re.match(r'\d+', board_str[i:]).group()
+            squares += [''] * int(digits)
+            i += len(digits)
+        else:
+            squares.append(board_str[i])
+            i += 1
+    rows = []
+    for row in range(8):
+        fen_row, empty = '', 0
+        for piece in squares[row * 8:row * 8 + 8]:
+            if piece == '':
+                empty += 1
+                continue
+            if empty > 0:
+                fen_row += str(empty)
+                empty = 0
+            fen_row += piece
+        rows.append(fen_row + (str(empty) if empty > 0 else ''))
+    castling = board_str[i:] or '-'
+    return f'{"/".join(rows)} {color[0]} {castling} - 0 1'
+
 
 class BookMoveManager:
-    def __init__(self):
+    def __init__(self, path=BOOK_PATH):
+        self.path = Path(path)
         self._book = None
         self._cursor = None
+        # board string -> {color: [packed moves]}
+        self.index = {}
+        self._mtime = None
+        self._checked = None
+        self.refresh()
 
     def connect(self):
         """ Connects to the SQLite database """
-
-        path = 'bookmoves.db' if Path('bookmoves.db').exists() else 'storage/bookmoves.db'
-        self._book = sqlite3.connect(path)
+        self._book = sqlite3.connect(self.path)
         self._cursor = self._book.cursor()
 
     def close(self):
@@ -125,10 +187,52 @@ class BookMoveManager:
             print(f'Entry {board_str} updated')
         self._book.commit()
 
-    def get_moves(self, board_str):
-        """ Retrieves list of moves for a given board """
-        self._cursor.execute("SELECT moves FROM book WHERE board_id = ?", (board_str, ))
+    def load(self):
+        """ Reads the whole book into the index. Each move goes to the side that recorded it, by its tag or, for
+            legacy moves, by the color of the piece it moves, and only if it is legal there """
+        book = sqlite3.connect(self.path)
         try:
-            return self._cursor.fetchone()[0].split()
-        except TypeError:
+            rows = book.execute("SELECT board_id, moves FROM book").fetchall()
+        finally:
+            book.close()
+        index = {}
+        for board_str, moves in rows:
+            entry = {}
+            # the key has no side to move, so the moves are read for both sides (see parse_book_move)
+            for color in ('white', 'black'):
+                board = Board.from_fen(board_str_to_fen(board_str, color))
+                legal_moves = {tuple(decode_move(move)[:4]): move for move in board.generate_legal_moves(color)}
+                packed_moves = []
+                for token in (moves or '').split():
+                    packed_move = parse_book_move(board, token, color, legal_moves)
+                    # the same move can be stored in both notations
+                    if packed_move is not None and packed_move not in packed_moves:
+                        packed_moves.append(packed_move)
+                if packed_moves:
+                    entry[color] = packed_moves
+            if entry:
+                index[board_str] = entry
+        self.index = index
+
+    def refresh(self):
+        """ Reloads the index if the book file changed, checking at most every REFRESH_INTERVAL seconds """
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < REFRESH_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self.index, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self.load()
+
+    def get_moves(self, board, color):
+        """ Returns the book moves for color on board as move lists, or None """
+        self.refresh()
+        moves = self.index.get(board.create_board_str(), {}).get(color)
+        if moves is None:
             return None
+        return [decode_move(move) for move in moves]
@@ -1,14 +1,26 @@
 import threading
 from pymongo.mongo_client import MongoClient
+from components.LRUCache import LRUCache
 from storage.BoardLog import BoardLog
 
+# documents read by board are kept this long; commit_log drops the boards it writes sooner
+READ_CACHE_SIZE = 4096
+READ_CACHE_TTL = 300.0
+PING_TTL = 5.0
+# cached for a board that is not in the collection, so repeated misses are answered locally too
+NOT_FOUND = object()
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, cache_size=READ_CACHE_SIZE, cache_ttl=READ_CACHE_TTL, ping_ttl=PING_TTL):
         self.client = None
         self.db = None
         self.collection = None
+        # board string -> document (or NOT_FOUND) of single-board reads
+        self.read_cache = LRUCache(cache_size, ttl=cache_ttl)
+        self.ping_cache = LRUCache(1, ttl=ping_ttl)
 
-        threading.Thread(target=self.connect).start()
+        self.connect_thread = threading.Thread(target=self.connect)
+        self.connect_thread.start()
 
     def connect(self):
         """ Connect to MongoDB """
@@ -21,35 +33,92 @@ class DatabaseManager:
             print('Unable to connect to MongoDB:', e)
 
     def ping(self):
+        """ True if MongoDB answers; the answer is reused for ping_ttl seconds """
+        result = self.ping_cache.get('ping')
+        if result is not None:
+            return result
         try:
             self.client.admin.command('ping')
-            return True
+            result = True
         except Exception as e:
             print('Unable to ping MongoDB')
-            return False
+            result = False
+        self.ping_cache.put('ping', result)
+        return result
+
+    def cache_stats(self):
+        """ Hit rates of the read and ping caches """
+        return {'read': self.read_cache.stats(), 'ping': self.ping_cache.stats()}
+
+    def invalidate(self, data):
+        """ Drops cached reads a write matching data may have changed """
+        board = data.get('board') if isinstance(data, dict) else None
+        if isinstance(board, str):
+            self.read_cache.invalidate(board)
+        else:
+            self.read_cache.clear()
 
     def create(self, data):
         try:
             if data is None:
                 raise Exception('Data is None')
             insert = self.collection.insert_many(data) if isinstance(data, list) else self.collection.insert_one(data)
+            for document in data if isinstance(data, list) else [data]:
+                self.invalidate(document)
             return insert.acknowledged
         except Exception as e:
             print('Error in DatabaseManager.create')
             print(e)
             return None
 
-    def read(self, data, many=False):
+    def read(self, data, many=False, cached=True):
+        """ Reads of a single board ({'board': board_str}) go through the read cache unless cached is False.
+            Cached documents are shared, so callers must not modify them """
+        board = data.get('board') if isinstance(data, dict) and len(data) == 1 and not many else None
+        if cached and isinstance(board, str):
+            document = self.read_cache.get(board)
+            if document is not None:
+                return None if document is NOT_FOUND else document
         try:
-            return self.collection.find_one(data) if many == False else self.collection.find(data)
+            if many:
+                return self.collection.find(data)
+            document = self.collection.find_one(data)
         except Exception as e:
             print('Error in DatabaseManager.read')
             print(e)
             return None
+        if cached and isinstance(board, str):
+            self.read_cache.put(board, NOT_FOUND if document is None else document)
+        return document
+
+    def read_many(self, boards):
+        """ Returns {board: document} for the given board strings, querying the ones not cached in one query;
+            missing boards are left out """
+        found = {}
+        missing = []
+        for board in set(boards):
+            document = self.read_cache.get(board)
+            if document is None:
+                missing.append(board)
+            elif document is not NOT_FOUND:
+                found[board] = document
+        if not missing:
+            return found
+        try:
+            documents = {document['board']: document for document in self.collection.find({'board': {'$in': missing}})}
+        except Exception as e:
+            print('Error in DatabaseManager.read_many')
+            print(e)
+            return None
+        for board in missing:
+            self.read_cache.put(board, documents.get(board, NOT_FOUND))
+        found.update(documents)
+        return found
 
     def update(self, find_data, update_data):
         try:
             result =  self.collection.update_many(find_data, {'$set': update_data})
+            self.invalidate(find_data)
             return result.modified_count
         except Exception as e:
             print('Error in DatabaseManager.update')
@@ -59,6 +128,7 @@ class DatabaseManager:
     def delete(self, data):
         try:
             result = self.collection.delete_many(data)
+            self.invalidate(data)
             return result.deleted_count
         except Exception as e:
             print('Error in DatabaseManager.delete')
@@ -73,7 +143,8 @@ class DatabaseManager:
             data = board_log.prepare_data(winner)
             for log in data:
                 board_str = log['board']
-                query = self.read({'board': board_str})
+                # merged into below, so it must be the stored document rather than a shared cached one
+                query = self.read({'board': board_str}, cached=False)
                 if query is None:
                     inserts.append(log)
                 else:
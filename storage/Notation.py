@@ -0,0 +1,131 @@
+"""
+Standard algebraic notation (SAN) and the game files opening books are built from.
+SAN is read case-sensitively: piece letters are upper case (N, B, R, Q, K) and files lower case, so
+bxc4 is a pawn capture and Bxc4 a bishop move. Games come from PGN files, where tags, comments,
+variations, move numbers, NAGs and results are skipped, or from line files holding one game per line
+as space separated SAN moves.
+"""
+import re
+
+from components.BitBoard import BitBoard
+from components.Board import decode_move
+
+SAN_FORMAT = re.compile(r"""
+    ^(?P<piece>[NBRQK])?
+    (?P<from_col>[a-h])?
+    (?P<from_row>[1-8])?
+    x?
+    (?P<dest>[a-h][1-8])
+    (=?(?P<promotion>[NBRQ]))?
+    [+#]?[!?]*$
+""", re.VERBOSE)
+CASTLING_FORMAT = re.compile(r'^(?P<castle>([O0]-){1,2}[O0])[+#]?[!?]*$')
+
+COMMENT = re.compile(r'\{[^}]*\}|;[^\n]*')
+VARIATION = re.compile(r'\([^()]*\)')
+MOVE_NUMBER = re.compile(r'^\d+\.+')
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+def parse_san(board, san, color):
+    """ Returns the packed legal move san stands for when played by color, or None if it is illegal,
+        ambiguous or not SAN """
+    legal_moves = board.generate_legal_moves(color)
+    castle = CASTLING_FORMAT.match(san)
+    if castle:
+        row = 7 if color == 'white' else 0
+        to_col = 2 if len(castle.group('castle')) == 5 else 6
+        if board.get_piece(row, 4) != ('K' if color == 'white' else 'k'):
+            return None
+        for move in legal_moves:
+            if decode_move(move) == [row, 4, row, to_col]:
+                return move
+        return None
+
+    match = SAN_FORMAT.match(san)
+    if not match:
+        return None
+    piece = match.group('piece') or 'P'
+    piece = piece if color == 'white' else piece.lower()
+    dest = match.group('dest')
+    to_row, to_col = 8 - int(dest[1]), ord(dest[0]) - ord('a')
+    from_col = None if match.group('from_col') is None else ord(match.group('from_col')) - ord('a')
+    from_row = None if match.group('from_row') is None else 8 - int(match.group('from_row'))
+    promotion = match.group('promotion')
+    promotion = None if promotion is None else promotion.lower()
+
+    to_sq = to_row * 8 + to_col
+    candidates = []
+    for move in legal_moves:
+        # most moves go elsewhere, so the target square is compared before unpacking
+        if move >> 6 & 63 != to_sq:
+            continue
+        move_from_row, move_from_col, _, _, *move_promotion = decode_move(move)
+        if (board.get_piece(move_from_row, move_from_col) != piece or
+                (from_col is not None and move_from_col != from_col) or
+                (from_row is not None and move_from_row != from_row) or
+                (move_promotion[0] if move_promotion else None) != promotion):
+            continue
+        candidates.append(move)
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def movetext_moves(text):
+    """ SAN moves of one game's movetext, without comments, variations, numbers, NAGs or the result """
+    text = COMMENT.sub(' ', text)
+    # variations can nest, so they are removed innermost first
+    count = 1
+    while count:
+        text, count = VARIATION.subn(' ', text)
+    moves = []
+    for token in text.split():
+        token = MOVE_NUMBER.sub('', token)
+        if token and not token.startswith('$') and token not in RESULTS:
+            moves.append(token)
+    return moves
+
+
+def read_pgn(path):
+    """ Yields the SAN moves of every game in a PGN file """
+    movetext = []
+    with open(path, encoding='utf-8', errors='replace') as pgn_file:
+        for line in pgn_file:
+            if line.startswith('['):
+                # a tag after movetext starts the next game
+                if movetext:
+                    yield movetext_moves(''.join(movetext))
+                    movetext = []
+                continue
+            movetext.append(line)
+    if movetext:
+        moves = movetext_moves(''.join(movetext))
+        if moves:
+            yield moves
+
+
+def read_lines(path):
+    """ Yields the SAN moves of every non-empty line of a line file; lines starting with # are skipped """
+    with open(path, encoding='utf-8', errors='replace') as line_file:
+        for line in line_file:
+            if line.strip() and not line.startswith('#'):
+                yield movetext_moves(line)
+
+
+def read_games(path):
+    """ Yields the SAN moves of every game in a .pgn file or a line file """
+    return read_pgn(path) if str(path).lower().endswith('.pgn') else read_lines(path)
+
+
+def replay(moves, board_class=BitBoard):
+    """ Plays a game from the starting position, yielding (board, color, move) before each move, with move
+        packed or None for the first move that cannot be played, after which the replay stops.
+        The same board is yielded every time, so read what is needed from it before the next step """
+    board = board_class()
+    color = 'white'
+    for san in moves:
+        move = parse_san(board, san, color)
+        yield board, color, move
+        if move is None:
+            return
+        board.make_move(*decode_move(move))
+        color = board.opposite_color(color)
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from components.BatchBoard import BatchBoard
+from components.BitBoard import BitBoard
+from components.Board import decode_move
+from components.Perft import REFERENCE_POSITIONS
+
+
+class BatchBoardTest(unittest.TestCase):
+    def test_reference_positions(self):
+        boards = [BitBoard.from_fen(fen) for _, fen, _ in REFERENCE_POSITIONS]
+        batch = BatchBoard.from_boards(boards)
+        index, moves = batch.legal_moves()
+        self.assertEqual(list(np.bincount(index)), [counts[0] for _, _, counts in REFERENCE_POSITIONS])
+
+        # play every root move then count replies, giving perft depth 2 for all positions at once
+        children = batch.select(index)
+        children.apply_moves(moves)
+        replies = np.bincount(index, weights=children.status()['legal_moves'])
+        self.assertEqual(list(replies), [counts[1] for _, _, counts in REFERENCE_POSITIONS])
+
+    def test_matches_board(self):
+        rng = np.random.default_rng(0)
+        batch = BatchBoard(16)
+        boards = batch.to_boards(BitBoard)
+        for _ in range(40):
+            index, moves = batch.legal_moves()
+            for position, board in enumerate(boards):
+                self.assertEqual(sorted(moves[index == position]), sorted(board.generate_legal_moves(board.side_to_move)))
+            self.assertEqual(list(batch.in_check()), [board.in_check(board.side_to_move) for board in boards])
+
+            chosen = batch.random_moves(rng)
+            batch.apply_moves(chosen)
+            for move, board in zip(chosen, boards):
+                if move:
+                    board.make_move(*decode_move(int(move)))
+            self.assertEqual([batch.to_board(position, BitBoard) for position in range(16)], boards)
+
+    def test_status(self):
+        batch = BatchBoard.from_boards([BitBoard.from_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1'),
+                                        BitBoard.from_fen('Q6k/8/6K1/8/8/8/8/8 b - - 0 1')])
+        status = batch.status()
+        self.assertEqual(list(status['stalemate']), [True, False])
+        self.assertEqual(list(status['checkmate']), [False, True])
+        self.assertEqual(batch.legal_move_masks().sum(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
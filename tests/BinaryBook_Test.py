@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from components.Board import Board, move_name
+from storage.BinaryBook import BinaryBook, RECORD, compile_book
+
+
+class BinaryBookTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.lines_path = os.path.join(directory, 'lines.txt')
+        self.book_path = os.path.join(directory, 'book.bin')
+        with open(self.lines_path, 'w') as lines_file:
+            lines_file.write('e4 e5 Nf3 Nc6\ne4 c5 Nf3\nd4 d5\n')
+
+    def tearDown(self):
+        for path in (self.lines_path, self.book_path):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(os.path.dirname(self.lines_path))
+
+    def test_compile_and_probe(self):
+        self.assertEqual(compile_book([self.lines_path], self.book_path), 8)
+        self.assertEqual(os.path.getsize(self.book_path), 8 * RECORD.size)
+        book = BinaryBook(self.book_path)
+        try:
+            board = Board()
+            entries = book.get_entries(board, 'white')
+            self.assertEqual(sorted((move_name(entry['move']), entry['weight']) for entry in entries),
+                             [('d2d4', 1), ('e2e4', 2)])
+            board.move_piece(6, 4, 4, 4)
+            self.assertEqual(sorted(book.get_moves(board, 'black')), [[1, 2, 3, 2], [1, 4, 3, 4]])
+            # white is not to move here, so white has no book moves
+            self.assertIsNone(book.get_moves(board, 'white'))
+        finally:
+            book.close()
+
+    def test_learn(self):
+        compile_book([self.lines_path], self.book_path)
+        book = BinaryBook(self.book_path, writable=True)
+        board = Board()
+        move = book.get_entries(board, 'white')[0]['move']
+        self.assertTrue(book.learn(board, 'white', move, 2))
+        book.close()
+        book = BinaryBook(self.book_path)
+        entry = book.get_entries(board, 'white')[0]
+        self.assertEqual((entry['learn_games'], entry['learn_points']), (1, 2))
+        book.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import Board
+
+
+def all_valid_moves(board, color):
+    moves = []
+    for loc in board.get_piece_locations(color):
+        for move in board.get_valid_moves(*loc, add_promotion=True):
+            moves.append(loc + move)
+    return sorted(moves, key=str)
+
+
+class BitBoardTest(unittest.TestCase):
+    def test_start_position(self):
+        board = BitBoard()
+        self.assertEqual(board.create_board_str(), Board().create_board_str())
+        self.assertEqual(len(all_valid_moves(board, 'white')), 20)
+        self.assertEqual(board.get_num_pieces(), 32)
+
+    def test_en_passant(self):
+        board = BitBoard()
+        for move in ([6, 4, 4, 4], [1, 0, 2, 0], [4, 4, 3, 4], [1, 3, 3, 3]):
+            self.assertTrue(board.move_piece(*move))
+        self.assertIn((2, 3), board.get_valid_moves(3, 4))
+        self.assertTrue(board.move_piece(3, 4, 2, 3))
+        self.assertEqual(board.get_piece(3, 3), '')
+
+    def test_rook_capture_removes_castling_rights(self):
+        board = BitBoard()
+        board.set_board_array([['r', '', '', '', 'k', '', '', 'r'],
+                               [''] * 8, [''] * 8, [''] * 8, [''] * 8, [''] * 8, [''] * 8,
+                               ['R', '', '', '', 'K', '', '', 'R']])
+        self.assertTrue(board.move_piece(7, 7, 0, 7))
+        self.assertEqual(board.get_castling_rights('black'), 'q')
+        self.assertEqual(board.get_castling_rights('white'), 'q')
+
+    def test_pins_and_en_passant_discovered_check(self):
+        for board in (Board(), BitBoard()):
+            # white king a5 and black rook h5 share a rank with the e5 pawn that may capture d5 en passant
+            board.set_board_array([[''] * 8, [''] * 8, [''] * 8,
+                                   ['K', '', '', 'p', 'P', '', '', 'r'],
+                                   ['', 'B', '', '', '', '', '', ''], [''] * 8,
+                                   ['', '', '', 'n', '', '', '', ''],
+                                   ['', '', '', '', 'k', '', '', '']])
+            board.set_king_loc('white', 3, 0)
+            board.set_king_loc('black', 7, 4)
+            board.set_double_move_col(3)
+            self.assertEqual(board.get_valid_moves(3, 4), [(2, 4)])
+            # the d2 knight is pinned to the black king by the b4 bishop
+            self.assertEqual(board.get_valid_moves(6, 3), [])
+
+    def test_matches_array_board(self):
+        random.seed(0)
+        array_board, bit_board = Board(), BitBoard()
+        color = 'white'
+        for _ in range(80):
+            moves = all_valid_moves(array_board, color)
+            self.assertEqual(moves, all_valid_moves(bit_board, color))
+            self.assertEqual(array_board.in_check(color), bit_board.in_check(color))
+            self.assertEqual(array_board.normalized_board_str(color), bit_board.normalized_board_str(color))
+            if not moves:
+                break
+            move = random.choice(moves)
+            array_board.move_piece(*move)
+            bit_board.move_piece(*move)
+            color = Board.opposite_color(color)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from copy import deepcopy
 from pprint import pprint
 
 from components.Board import Board
@@ -16,6 +17,25 @@ class MyTestCase(unittest.TestCase):
         pprint(log.get_log()[1].get_board_array())
         pprint(log.get_log()[1].normalized_board_str())
 
+    def test_threefold_repetition(self):
+        board = Board()
+        log = BoardLog()
+        shuffle = [[7, 6, 5, 5], [0, 6, 2, 5], [5, 5, 7, 6], [2, 5, 0, 6]]
+        for move in shuffle * 2:
+            self.assertFalse(log.get_draw_status())
+            log.add_entry(deepcopy(board), *move)
+            board.move_piece(*move)
+        log.add_entry(deepcopy(board), *shuffle[0])
+        self.assertTrue(log.get_draw_status())
+
+    def test_repetition_respects_side_to_move(self):
+        board = Board()
+        moved = deepcopy(board)
+        moved.move_piece(7, 6, 5, 5)
+        moved.move_piece(5, 5, 7, 6)
+        self.assertEqual(board.create_board_str(), moved.create_board_str())
+        self.assertNotEqual(board.zobrist_key, moved.zobrist_key)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,10 @@
 import unittest
+from copy import deepcopy
 from pprint import pprint
 
-from components.Board import Board
+from components.BitBoard import BitBoard
+from components.Evaluation import WEIGHTS
+from components.Board import Board, encode_move, decode_move, move_flag, MOVE_CASTLING, MOVE_CACHE_SIZE
 
 
 class MyTestCase(unittest.TestCase):
@@ -41,5 +44,111 @@ class MyTestCase(unittest.TestCase):
         print('get_valid_moves(6, 0, add_promotion=True):', board.get_valid_moves(6, 0, add_promotion=True))
         print('get_valid_moves(6, 0, add_promotion=True):', board.get_valid_moves(6, 0, add_promotion=True))
 
+    def test_make_unmake_restores_board(self):
+        board = Board()
+        for move in ([6, 4, 4, 4], [1, 3, 3, 3], [4, 4, 3, 4], [1, 5, 3, 5], [7, 6, 5, 5], [0, 1, 2, 2],
+                     [7, 5, 6, 4]):
+            board.move_piece(*move)
+        for color in ('white', 'black'):
+            for loc in board.get_piece_locations(color):
+                for move in board.get_valid_moves(*loc, add_promotion=True):
+                    before = deepcopy(board)
+                    undo = board.make_move(*loc, *move)
+                    board.unmake_move(undo)
+                    self.assertEqual(board, before)
+                    self.assertEqual(board.king_loc(color), before.king_loc(color))
+
+    def test_en_passant_and_castling_undo(self):
+        board = Board()
+        for move in ([6, 4, 4, 4], [1, 0, 2, 0], [4, 4, 3, 4], [2, 0, 3, 0], [7, 6, 5, 5], [3, 0, 4, 0],
+                     [7, 5, 6, 4], [1, 3, 3, 3]):
+            board.move_piece(*move)
+        before = deepcopy(board)
+        undo = board.make_move(3, 4, 2, 3)
+        self.assertEqual(board.get_piece(3, 3), '')
+        board.unmake_move(undo)
+        self.assertEqual(board, before)
+
+        undo = board.make_move(7, 4, 7, 6)
+        self.assertEqual(board.get_piece(7, 5), 'R')
+        self.assertEqual(board.get_castling_rights('white'), '')
+        board.unmake_move(undo)
+        self.assertEqual(board, before)
+        self.assertEqual(board.king_loc('white'), (7, 4))
+
+    def test_generate_legal_moves(self):
+        board = Board()
+        moves = board.generate_legal_moves('white')
+        self.assertEqual(len(moves), 20)
+        self.assertIn(encode_move(6, 4, 4, 4), moves)
+        self.assertEqual(decode_move(encode_move(1, 0, 0, 0, 'q')), [1, 0, 0, 0, 'q'])
+        self.assertEqual(move_flag(encode_move(7, 4, 7, 6, flag=MOVE_CASTLING)), MOVE_CASTLING)
+
+    def test_status(self):
+        board = Board()
+        for move in ([6, 5, 5, 5], [1, 4, 3, 4], [6, 6, 4, 6], [0, 3, 4, 7]):
+            board.move_piece(*move)
+        self.assertEqual(board.status('white'), {'check': True, 'checkmate': True, 'stalemate': False, 'legal_moves': 0})
+        self.assertTrue(board.in_checkmate('white'))
+
+        board = Board.from_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        self.assertTrue(board.status('black')['stalemate'])
+        self.assertEqual(board.status('white')['legal_moves'], 26)
+
+    def test_static_exchange(self):
+        for board_class in (Board, BitBoard):
+            # rook takes an undefended pawn
+            board = board_class.from_fen('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1')
+            self.assertEqual(board.static_exchange(7, 4, 3, 4), 100)
+            # knight takes a pawn defended by the knight and the x-rayed bishop and queen behind it
+            board = board_class.from_fen('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1')
+            self.assertEqual(board.static_exchange(5, 3, 3, 4), -220)
+            self.assertEqual(board.square_exchange(3, 4, 'white'), 0)
+
+    def test_incremental_evaluation(self):
+        for board_class in (Board, BitBoard):
+            board = board_class()
+            self.assertEqual(board.evaluate('white'), 0)
+            undo_records = []
+            for move in ([6, 4, 4, 4], [1, 3, 3, 3], [4, 4, 3, 3], [0, 3, 3, 3], [7, 6, 5, 5]):
+                undo_records.append(board.make_move(*move))
+                sums = (board.eval_midgame, board.eval_endgame, board.eval_phase)
+                board.refresh_evaluation()
+                self.assertEqual((board.eval_midgame, board.eval_endgame, board.eval_phase), sums)
+            # material is level after the pawn trade and white is ahead in development
+            self.assertGreater(board.evaluate('white'), 0)
+            self.assertEqual(board.evaluate('black'), -board.evaluate('white'))
+            for undo in reversed(undo_records):
+                board.unmake_move(undo)
+            self.assertEqual((board.eval_midgame, board.eval_endgame, board.eval_phase), (0, 0, WEIGHTS.max_phase))
+
+    def test_move_cache(self):
+        Board.move_cache.clear()
+        board = Board()
+        moves = board.get_valid_moves(6, 4)
+        self.assertEqual(Board.move_cache.misses, 1)
+        self.assertEqual(Board().get_valid_moves(6, 4), moves)
+        self.assertEqual(Board.move_cache.hits, 1)
+
+        Board.set_move_cache_size(2)
+        for move in ([6, 4, 4, 4], [1, 4, 3, 4], [7, 6, 5, 5]):
+            board.move_piece(*move)
+            board.generate_legal_moves('white')
+        self.assertEqual(len(Board.move_cache), 2)
+        Board.set_move_cache_size(MOVE_CACHE_SIZE)
+
+    def test_setters_update_key(self):
+        for board in (Board.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w KQkq -'),
+                      BitBoard.from_fen('r3k2r/8/8/8/8/8/8/R3K2R w KQkq -')):
+            self.assertEqual(len(board.generate_legal_moves('white')), 26)
+            board.set_castling_rights('white', '')
+            self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+            self.assertEqual(len(board.generate_legal_moves('white')), 24)
+            board.set_king_loc('black', 0, 3)
+            board.set_double_move_col(2)
+            board.set_side_to_move('black')
+            self.assertEqual(board.zobrist_key, board.compute_zobrist_key())
+
+
 if __name__ == '__main__':
     unittest.main()
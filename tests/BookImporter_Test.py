@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from components.Board import Board
+from storage.BookImporter import BookImporter
+from storage.BookMoveManager import BookMoveManager
+
+
+class BookImporterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.book_path = os.path.join(self.directory, 'book.db')
+        self.lines_path = os.path.join(self.directory, 'lines.txt')
+        book = sqlite3.connect(self.book_path)
+        book.execute('CREATE TABLE book (board_id TEXT NOT NULL PRIMARY KEY, moves TEXT)')
+        book.execute('INSERT INTO book VALUES (?, ?)', (Board().create_board_str(), 'd4'))
+        book.commit()
+        book.close()
+        with open(self.lines_path, 'w') as lines_file:
+            lines_file.write('1. e4 e5 2. Nf3 Nc6\ne4 e5 Nf3 Nf6\nd4 d5 Ke3\n')
+
+    def tearDown(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def test_import(self):
+        importer = BookImporter(self.book_path)
+        report = importer.import_files([self.lines_path])
+        self.assertEqual(report['lines'], 3)
+        self.assertEqual(report['rejected'], 1)
+        self.assertEqual(importer.rejected, [(self.lines_path, 3, 2, 'Ke3')])
+        # start, after e4, after e4 e5, after e4 e5 Nf3 and after d4
+        self.assertEqual(report['positions'], 5)
+
+        book = BookMoveManager(self.book_path)
+        self.assertEqual(book.get_moves(Board(), 'white'), [[6, 3, 4, 3], [6, 4, 4, 4]])
+        board = Board()
+        for move in ([6, 4, 4, 4], [1, 4, 3, 4], [7, 6, 5, 5]):
+            board.move_piece(*move)
+        self.assertEqual(book.get_moves(board, 'black'), [[0, 1, 2, 2], [0, 6, 2, 5]])
+
+        # importing the same lines again adds nothing
+        self.assertEqual(BookImporter(self.book_path).import_files([self.lines_path])['rows_written'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from components.Board import Board
+from storage.BookMoveManager import BookMoveManager, board_str_to_fen
+
+
+class BookMoveManagerTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        book = sqlite3.connect(self.path)
+        book.execute('CREATE TABLE book (board_id TEXT NOT NULL PRIMARY KEY, moves TEXT)')
+        book.execute('INSERT INTO book VALUES (?, ?)', (Board().create_board_str(), 'e4 d4 qxh7'))
+        book.commit()
+        book.close()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_board_str_to_fen(self):
+        board = Board()
+        board.move_piece(6, 4, 4, 4)
+        board.set_castling_rights('black', 'k')
+        fen = board_str_to_fen(board.create_board_str(), 'black')
+        self.assertEqual(fen, 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQk - 0 1')
+
+    def test_index(self):
+        book = BookMoveManager(self.path)
+        # the illegal qxh7 is dropped when the book is read
+        self.assertEqual(book.get_moves(Board(), 'white'), [[6, 4, 4, 4], [6, 3, 4, 3]])
+        self.assertIsNone(book.get_moves(Board(), 'black'))
+
+        connection = sqlite3.connect(self.path)
+        connection.execute('UPDATE book SET moves = ?', ('nf3', ))
+        connection.commit()
+        connection.close()
+        os.utime(self.path, ns=(0, 0))
+        book._checked = None
+        self.assertEqual(book.get_moves(Board(), 'white'), [[7, 6, 5, 5]])
+
+    def test_legacy_moves_are_not_san(self):
+        # bxc3 and bb5 are white bishop moves in the legacy form, but b2xc3 and b7-b5 would be legal as SAN
+        board = Board.from_fen('4k3/1p6/8/8/8/2b5/1P6/4BB1K w - - 0 1')
+        connection = sqlite3.connect(self.path)
+        connection.execute('INSERT INTO book VALUES (?, ?)', (board.create_board_str(), 'bxc3 bb5 b:Kd8 w:Bd3'))
+        connection.commit()
+        connection.close()
+        book = BookMoveManager(self.path)
+        self.assertEqual(book.get_moves(board, 'white'), [[7, 4, 5, 2], [7, 5, 3, 1], [7, 5, 5, 3]])
+        self.assertEqual(book.get_moves(board, 'black'), [[0, 4, 0, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
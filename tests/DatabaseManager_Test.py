@@ -0,0 +1,97 @@
+import time
+import unittest
+from copy import deepcopy
+
+from components.Board import Board
+from storage.BoardLog import BoardLog
+from storage.DatabaseManager import DatabaseManager
+
+
+class FakeResult:
+    acknowledged = True
+    modified_count = 1
+    deleted_count = 1
+
+
+class FakeCollection:
+    """ Counts the queries that would reach MongoDB; documents are returned as copies, as MongoDB does """
+
+    def __init__(self, documents):
+        self.documents = {document['board']: document for document in documents}
+        self.queries = 0
+
+    def find_one(self, data):
+        self.queries += 1
+        return deepcopy(self.documents.get(data['board']))
+
+    def find(self, data):
+        self.queries += 1
+        return [deepcopy(self.documents[board]) for board in data['board']['$in'] if board in self.documents]
+
+    def update_many(self, find_data, update_data):
+        self.documents[find_data['board']] = dict(update_data['$set'])
+        return FakeResult()
+
+    def insert_many(self, data):
+        for document in data:
+            self.documents[document['board']] = deepcopy(document)
+        return FakeResult()
+
+
+class DatabaseManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.db = DatabaseManager(cache_ttl=0.2)
+        self.db.connect_thread.join()
+        self.db.collection = FakeCollection([{'board': 'a', 'moves': []}])
+
+    def test_read_cache(self):
+        self.assertEqual(self.db.read({'board': 'a'})['board'], 'a')
+        self.assertEqual(self.db.read({'board': 'a'})['board'], 'a')
+        # boards that are not stored are remembered too
+        self.assertIsNone(self.db.read({'board': 'b'}))
+        self.assertIsNone(self.db.read({'board': 'b'}))
+        self.assertEqual(self.db.collection.queries, 2)
+        self.assertEqual(self.db.cache_stats()['read']['hits'], 2)
+
+        self.assertEqual(set(self.db.read_many(['a', 'b', 'c'])), {'a'})
+        self.assertEqual(set(self.db.read_many(['a', 'b', 'c'])), {'a'})
+        self.assertEqual(self.db.collection.queries, 3)
+
+        time.sleep(0.25)
+        self.db.read({'board': 'a'})
+        self.assertEqual(self.db.collection.queries, 4)
+
+    def test_commit_invalidates(self):
+        self.assertIsNone(self.db.read({'board': 'c'}))
+        self.db.create([{'board': 'c', 'moves': []}])
+        self.assertEqual(self.db.read({'board': 'c'})['board'], 'c')
+        self.db.read({'board': 'a'})
+        self.db.update({'board': 'a'}, {'board': 'a', 'moves': [{'id': '6444', 'win': 1, 'draw': 0, 'loss': 0}]})
+        self.assertEqual(len(self.db.read({'board': 'a'})['moves']), 1)
+
+    def test_commit_log(self):
+        board = Board()
+        log = BoardLog()
+        for move in ([6, 4, 4, 4], [1, 4, 3, 4], [7, 6, 5, 5]):
+            log.add_entry(deepcopy(board), *move)
+            board.move_piece(*move)
+        start = log.get_log()[0].normalized_board_str()
+
+        self.assertTrue(self.db.commit_log(log, 'white'))
+        cached = self.db.read({'board': start})
+        self.assertEqual(cached['moves'], [{'id': '6444', 'win': 1, 'loss': 0, 'draw': 0}])
+        self.assertTrue(self.db.commit_log(log, 'white'))
+        # the document read before the commit is left alone and the next read sees the merged stats
+        self.assertEqual(cached['moves'][0]['win'], 1)
+        self.assertEqual(self.db.read({'board': start})['moves'][0]['win'], 2)
+
+        # counts merged for a write that failed are not served from the cache
+        def fail(find_data, update_data):
+            raise Exception('write failed')
+        self.db.collection.update_many = fail
+        self.db.commit_log(log, 'white')
+        self.assertEqual(self.db.read({'board': start})['moves'][0]['win'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
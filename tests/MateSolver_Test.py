@@ -0,0 +1,36 @@
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import Board
+from components.MateSolver import MateSolver
+
+
+class MateSolverTest(unittest.TestCase):
+    def test_mate_in_one(self):
+        for board_class in (Board, BitBoard):
+            board = board_class.from_fen('6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1')
+            result = MateSolver().solve(board, 'white')
+            self.assertEqual(result['move'], [7, 0, 0, 0])
+            self.assertEqual(result['mate_in'], 1)
+
+    def test_mate_in_three(self):
+        fen = '2r3k1/p4p2/3Rp2p/1p2P1pK/8/1P4P1/P3Q2P/1q6 b - - 0 1'
+        board = BitBoard.from_fen(fen)
+        solver = MateSolver(max_mate=3)
+        result = solver.solve(board, 'black')
+        self.assertEqual(result['pv'], ['b1g6'])
+        self.assertEqual(result['mate_in'], 3)
+        self.assertEqual(board, BitBoard.from_fen(fen))
+        # a shallower solver does not find it
+        self.assertIsNone(MateSolver(max_mate=2).solve(board, 'black'))
+        # the hash keeps the proof for the next call
+        self.assertLess(solver.solve(board, 'black')['nodes'], result['nodes'])
+
+    def test_no_mate(self):
+        board = BitBoard()
+        self.assertIsNone(MateSolver().solve(board, 'white'))
+        self.assertEqual(board, BitBoard())
+
+
+if __name__ == '__main__':
+    unittest.main()
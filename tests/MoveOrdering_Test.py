@@ -0,0 +1,30 @@
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import encode_move, move_name
+from components.MoveOrdering import MoveOrdering
+
+
+class MoveOrderingTest(unittest.TestCase):
+    def test_captures_by_mvv_lva(self):
+        # the d4 pawn and the b3 knight can both take the c5 rook, and the knight can also take the a5 pawn
+        board = BitBoard.from_fen('4k3/8/8/p1r5/3P4/1N6/8/4K3 w - - 0 1')
+        moves = MoveOrdering().order(board, board.generate_legal_moves('white'))
+        self.assertEqual([move_name(move) for move in moves[:3]], ['d4c5', 'b3c5', 'b3a5'])
+
+    def test_killers_and_history(self):
+        board = BitBoard()
+        ordering = MoveOrdering()
+        killer, history_move = encode_move(6, 0, 5, 0), encode_move(6, 7, 4, 7)
+        ordering.add_cutoff(board, history_move, 3, 4)
+        ordering.add_cutoff(board, killer, 2, 1)
+        moves = ordering.order(board, board.generate_legal_moves('white'), ply=2, hash_move=encode_move(7, 6, 5, 5))
+        self.assertEqual(moves[:3], [encode_move(7, 6, 5, 5), killer, history_move])
+
+        ordering.decay()
+        self.assertEqual(ordering.killers[2], [0, 0])
+        self.assertEqual(ordering.history['white'][history_move & 4095], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
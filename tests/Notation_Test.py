@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import encode_move, move_name
+from storage.Notation import movetext_moves, parse_san, read_games, replay
+
+
+class NotationTest(unittest.TestCase):
+    def test_parse_san(self):
+        board = BitBoard.from_fen('r3k2r/1P6/8/8/2p5/1B6/8/R3K2R w KQkq - 0 1')
+        self.assertEqual(move_name(parse_san(board, 'Bxc4', 'white')), 'b3c4')
+        self.assertEqual(move_name(parse_san(board, 'bxa8=Q+', 'white')), 'b7a8q')
+        self.assertEqual(move_name(parse_san(board, 'b8=N', 'white')), 'b7b8n')
+        self.assertEqual(parse_san(board, 'O-O-O', 'white'), encode_move(7, 4, 7, 2, flag=3))
+        self.assertEqual(move_name(parse_san(board, 'Rab1', 'white')), 'a1b1')
+        # upper case only: bxc4 is a pawn capture, and there is no pawn to make it
+        self.assertIsNone(parse_san(board, 'bxc4', 'white'))
+        self.assertIsNone(parse_san(board, 'Kd3', 'white'))
+
+    def test_read_games(self):
+        self.assertEqual(movetext_moves('1. e4 {best} e5 (1... c5 2. Nf3 (2. c3)) 2. Nf3 $1 Nc6 1-0'),
+                         ['e4', 'e5', 'Nf3', 'Nc6'])
+        handle, path = tempfile.mkstemp(suffix='.pgn')
+        with os.fdopen(handle, 'w') as pgn_file:
+            pgn_file.write('[Event "a"]\n\n1. d4 d5 *\n\n[Event "b"]\n[Round "1"]\n\n1. e4 e5 2. Ke3 1-0\n')
+        try:
+            games = list(read_games(path))
+        finally:
+            os.remove(path)
+        self.assertEqual(games, [['d4', 'd5'], ['e4', 'e5', 'Ke3']])
+        self.assertEqual([move is None for _, _, move in replay(games[1])], [False, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
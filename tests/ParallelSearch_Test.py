@@ -0,0 +1,30 @@
+import unittest
+
+from components.BitBoard import BitBoard
+from components.ParallelSearch import ParallelSearch
+from components.Perft import REFERENCE_POSITIONS
+from components.Search import Search
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def test_matches_single_process(self):
+        parallel_search = ParallelSearch(workers=2)
+        try:
+            for _, fen, _ in REFERENCE_POSITIONS[1:3]:
+                board = BitBoard.from_fen(fen)
+                expected = Search(BitBoard.from_fen(fen), max_depth=2).search(board.side_to_move)
+                result = parallel_search.search(board, board.side_to_move, max_depth=2)
+                self.assertEqual(result['score'], expected['score'])
+                self.assertEqual(result['depth'], 2)
+                self.assertEqual(result['workers'], 2)
+                self.assertEqual(set(result), set(expected) | {'workers', 'cpu_utilisation', 'speedup'})
+                self.assertIsNone(result['speedup'])
+            parallel_search.baseline_nps = 1000.0
+            result = parallel_search.search(board, board.side_to_move, max_depth=2)
+            self.assertAlmostEqual(result['speedup'], result['nps'] / 1000.0)
+        finally:
+            parallel_search.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import Board
+from components.Perft import REFERENCE_POSITIONS, START_FEN, check_reference, divide, perft
+
+
+class PerftTest(unittest.TestCase):
+    def test_reference_positions(self):
+        for board_class in (Board, BitBoard):
+            self.assertEqual(check_reference(board_class, max_nodes=10000, verbose=False), [])
+
+    def test_divide_sums_to_perft(self):
+        board = BitBoard.from_fen(REFERENCE_POSITIONS[1][1])
+        counts = divide(board, 2, 'white')
+        self.assertEqual(len(counts), 48)
+        self.assertEqual(sum(counts.values()), perft(board, 2, 'white'))
+
+    def test_fen_round_trip(self):
+        self.assertEqual(Board.from_fen(START_FEN), Board())
+        self.assertEqual(Board.from_fen(START_FEN).zobrist_key, Board().zobrist_key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import decode_move, encode_move
+from components.Ponder import Ponderer
+from components.TranspositionTable import SharedTranspositionTable
+
+
+class PonderTest(unittest.TestCase):
+    def test_hit_and_miss(self):
+        table = SharedTranspositionTable(1)
+        ponderer = Ponderer(table, max_depth=3)
+        try:
+            # white has played e4; black is expected to answer e5
+            board = BitBoard.from_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+            reply = encode_move(1, 4, 3, 4)
+            ponderer.start(board, 'white', reply)
+            self.assertEqual(board, BitBoard.from_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'))
+            board.move_piece(1, 4, 3, 4)
+            result = ponderer.finish(board)
+            self.assertIsNotNone(result)
+            self.assertIn(result['move'], [decode_move(move) for move in board.generate_legal_moves('white')])
+            self.assertEqual(ponderer.hits, 1)
+
+            # black answered d5 instead: the ponder search is dropped
+            board = BitBoard.from_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
+            ponderer.start(board, 'white', reply)
+            board.move_piece(1, 3, 3, 3)
+            self.assertIsNone(ponderer.finish(board))
+            self.assertEqual(ponderer.misses, 1)
+            self.assertFalse(ponderer.is_pondering())
+        finally:
+            ponderer.close()
+            table.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Board import Board
+from components.Search import Search, MATE_SCORE, MAX_PLY
+
+
+class SearchTest(unittest.TestCase):
+    def test_finds_mate(self):
+        for board_class in (Board, BitBoard):
+            board = board_class.from_fen('r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR w KQkq - 0 1')
+            before = board.zobrist_key
+            result = Search(board, max_depth=3).search('white')
+            self.assertEqual(result['move'], [5, 5, 1, 5])
+            self.assertEqual(result['score'], MATE_SCORE - 1)
+            self.assertEqual(result['pv'], ['f3f7'])
+            self.assertEqual(board.zobrist_key, before)
+
+    def test_wins_material(self):
+        # the black queen on d5 is hanging to the c4 bishop
+        board = BitBoard.from_fen('4k3/8/8/3q4/2B5/8/8/4K3 w - - 0 1')
+        result = Search(board, max_depth=2).search('white')
+        self.assertEqual(result['pv'][0], 'c4d5')
+        self.assertGreater(result['score'], 0)
+
+    def test_quiescence_sees_recapture(self):
+        # the d5 pawn is defended, so taking it with the queen loses the queen one ply past the horizon
+        board = BitBoard.from_fen('4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1')
+        result = Search(board, max_depth=1).search('white')
+        self.assertNotEqual(result['pv'][0], 'd1d5')
+
+    def test_quiescence_ply_cap(self):
+        # white is in check, so quiescence would search every evasion past the end of the pv table
+        board = BitBoard.from_fen('4k3/8/8/8/8/8/4q3/4K3 w - - 0 1')
+        search = Search(board)
+        search.nodes = 1
+        self.assertEqual(search._quiescence(-MATE_SCORE, MATE_SCORE, 'white', MAX_PLY), board.evaluate('white'))
+
+    def test_node_budget(self):
+        board = BitBoard()
+        result = Search(board, node_limit=500).search('white')
+        self.assertLessEqual(result['nodes'], 500)
+        self.assertEqual(board, BitBoard())
+        self.assertIn(len(result['move']), (4, 5))
+
+    def test_stop_event(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        board = BitBoard()
+        result = Search(board, stop_event=stop_event).search('white')
+        # the stop is seen at the first check, after at most 256 nodes
+        self.assertLessEqual(result['depth'], 1)
+        self.assertLessEqual(result['nodes'], 256)
+        self.assertIn(len(result['move']), (4, 5))
+        self.assertEqual(board, BitBoard())
+
+    def test_no_moves(self):
+        board = BitBoard.from_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+        self.assertIsNone(Search(board, max_depth=2).search('black'))
+
+
+if __name__ == '__main__':
+    unittest.main()
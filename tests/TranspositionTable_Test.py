@@ -0,0 +1,66 @@
+import pickle
+import unittest
+
+from components.BitBoard import BitBoard
+from components.Search import Search
+from components.TranspositionTable import SharedTranspositionTable, TranspositionTable, EXACT, LOWER, UPPER
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_store_and_probe(self):
+        table = TranspositionTable(1)
+        self.assertEqual(table.buckets, 1024 * 1024 // 32)
+        table.store(12345, 0x1234, -250, 3, UPPER)
+        self.assertEqual(table.probe(12345), (0x1234, -250, 3, UPPER))
+        self.assertIsNone(table.probe(54321))
+        self.assertEqual(table.hit_rate(), 0.5)
+
+    def test_replacement(self):
+        table = TranspositionTable(1)
+        deep, shallow, newer = 7, 7 + table.buckets, 7 + 2 * table.buckets
+        table.store(deep, 1, 10, 6, EXACT)
+        # a shallower result goes to the always-replace slot and keeps the deep one
+        table.store(shallow, 2, 20, 2, LOWER)
+        table.store(newer, 3, 30, 1, LOWER)
+        self.assertEqual(table.probe(deep), (1, 10, 6, EXACT))
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(newer), (3, 30, 1, LOWER))
+
+        # once aged, the deep entry gives way to any result from the new search
+        table.new_search()
+        table.store(shallow, 2, 20, 2, LOWER)
+        self.assertIsNone(table.probe(deep))
+        self.assertEqual(table.probe(shallow), (2, 20, 2, LOWER))
+
+    def test_search_reuses_table(self):
+        table = TranspositionTable(1)
+        board = BitBoard()
+        first = Search(board, max_depth=3, transposition_table=table).search('white')
+        second = Search(board, max_depth=3, transposition_table=table).search('white')
+        self.assertEqual(first['score'], second['score'])
+        self.assertLess(second['nodes'], first['nodes'])
+        self.assertGreater(table.stats()['hit_rate'], 0)
+
+    def test_shared_table(self):
+        table = SharedTranspositionTable(1)
+        attached = pickle.loads(pickle.dumps(table))
+        try:
+            self.assertFalse(attached.owner)
+            attached.store(12345, 0x1234, 75, 4, EXACT)
+            self.assertEqual(table.probe(12345), (0x1234, 75, 4, EXACT))
+            # only the owner ages entries, and every process sees the generation
+            attached.new_search()
+            table.new_search()
+            self.assertEqual(attached.generation, 1)
+
+            # a data word from another store no longer matches the check word: a miss, not a wrong entry
+            index = (12345 % table.buckets) * 4
+            table.table[index + 1] ^= 1 << 20
+            self.assertIsNone(attached.probe(12345))
+        finally:
+            attached.close()
+            table.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()